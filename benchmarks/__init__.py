@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Les benchmarks changent de répertoire de travail (la base et ses fichiers y
+# sont créés) : les modules de l'application restent importables
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
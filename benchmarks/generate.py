@@ -0,0 +1,160 @@
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+from datetime import date, timedelta
+
+# Répartitions réalistes pour un service de recrutement (ordres de grandeur)
+STATUTS = {"En attente": 55, "Entretien": 20, "Refusé": 18, "Accepté": 7}
+PRIORITES = {"Moyenne": 45, "Basse": 25, "Haute": 22, "Urgente": 8}
+SOURCES = {"LinkedIn": 38, "Indeed": 22, "Site Web": 15, "Email": 10, "Recommandation": 10, "Autre": 5}
+PRENOMS = [
+    "Camille", "Léa", "Chloé", "Inès", "Manon", "Hélène", "Zoé", "Anaïs", "Lucas", "Hugo", "Théo",
+    "Gabriel", "Raphaël", "Noé", "Jérôme", "François", "Amine", "Yasmine", "Karim", "Sofia", "Éloïse",
+]
+NOMS = [
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+    "Simon", "Laurent", "Lefèvre", "Michel", "Garcia", "David", "Bertrand", "Roux", "Vincent", "Fournier",
+    "Morel", "Girard", "André", "Mercier", "Dupont", "Lambert", "Bonnet", "François", "Martinez", "Benali",
+]
+POSTES = [
+    "Développeur Python", "Développeuse Java", "Data Analyst", "Chef de projet", "Comptable",
+    "Assistant RH", "Commercial", "Ingénieur DevOps", "Designer UX", "Technicien support",
+    "Responsable logistique", "Juriste", "Chargée de communication", "Administrateur système",
+]
+MOTS = (
+    "entretien téléphonique motivé disponible immédiatement expérience solide projet équipe client "
+    "relance prévue références vérifiées prétentions salariales mobilité télétravail anglais courant "
+    "profil junior senior autonome rigoureux préavis mois rappeler semaine prochaine très bon échange "
+    "compétences techniques à approfondir test technique réussi manager convaincu"
+).split()
+PHOTO_POOL = 200
+ATTACHMENT_POOL = 300
+BATCH = 20000
+
+
+def weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def notes_text(rng):
+    # 30 % sans notes, sinon de quelques mots à quelques kilo-octets
+    if rng.random() < 0.3:
+        return None
+    words = int(min(rng.lognormvariate(3.2, 1.0), 600)) + 1
+    return " ".join(rng.choice(MOTS) for _ in range(words)).capitalize() + "."
+
+
+def png_bytes(rng, size=256):
+    # PNG RVB de bruit (incompressible, comme une vraie photo) sans dépendance
+    raw = b"".join(b"\x00" + rng.randbytes(size * 3) for _ in range(size))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b"")
+
+
+def media_pool(db, rng, workdir):
+    # Photos et pièces jointes rangées par le vrai stockage (FileStore), puis
+    # partagées entre candidats comme le fait le dédoublonnage
+    from file_store import FileStore
+    from candidature_core import ATTACH_DIR, PHOTO_DIR
+    sources = os.path.join(workdir, "sources")
+    os.makedirs(sources, exist_ok=True)
+    photo_store = FileStore(PHOTO_DIR, db)
+    attach_store = FileStore(ATTACH_DIR, db)
+    photos, attachments = [], []
+    for i in range(PHOTO_POOL):
+        path = os.path.join(sources, f"photo_{i}.png")
+        with open(path, "wb") as f:
+            f.write(png_bytes(rng))
+        photos.append(photo_store.put(path))
+    for i in range(ATTACHMENT_POOL):
+        ext = rng.choice([".pdf", ".docx", ".jpg"])
+        path = os.path.join(sources, f"piece_{i}{ext}")
+        with open(path, "wb") as f:
+            f.write(rng.randbytes(int(rng.lognormvariate(11, 1))))
+        attachments.append(attach_store.put(path))
+    return photos, attachments
+
+
+def generate_database(path, rows, seed=42, workdir=None, progress=None):
+    # Crée (ou remplace) une base candidates de rows lignes réalistes. Les
+    # fichiers sont créés dans le répertoire courant (photos/, attachments/),
+    # comme pour l'application.
+    from candidature_core import DatabaseManager
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    rng = random.Random(seed)
+    db = DatabaseManager(path)
+    photos, attachments = media_pool(db, rng, workdir or os.path.dirname(os.path.abspath(path)))
+    sizes = dict(db.connect().execute("SELECT path, size FROM stored_files").fetchall())
+    start = date.today() - timedelta(days=3 * 365)
+    done = 0
+    conn = db.connect()
+    while done < rows:
+        count = min(BATCH, rows - done)
+        candidates, files = [], []
+        for candidate_id in range(done + 1, done + count + 1):
+            prenom, nom = rng.choice(PRENOMS), rng.choice(NOMS)
+            day = start + timedelta(days=rng.randrange(3 * 365))
+            photo = rng.choice(photos) if rng.random() < 0.6 else None
+            cv = rng.choice(attachments) if rng.random() < 0.7 else None
+            candidates.append((
+                candidate_id, f"{prenom} {nom}", rng.choice(POSTES),
+                f"{prenom}.{nom}.{candidate_id}@exemple.fr".lower(), f"06{rng.randrange(10 ** 8):08d}",
+                day.isoformat(), weighted(rng, STATUTS), weighted(rng, PRIORITES), notes_text(rng),
+                cv, photo, weighted(rng, SOURCES), f"{day.isoformat()} {rng.randrange(8, 19):02d}:00:00",
+            ))
+            if cv:
+                files.append((candidate_id, "cv", cv, sizes[cv], "application/pdf", 0))
+            if photo:
+                files.append((candidate_id, "photo", photo, sizes[photo], "image/png", 0))
+            for position in range(min(int(rng.expovariate(1.2)), 6)):
+                piece = rng.choice(attachments)
+                files.append((candidate_id, "attachment", piece, sizes[piece], None, position))
+        with conn:
+            conn.executemany('''
+                INSERT INTO candidates (
+                    id, nom_complet, poste_demande, email, telephone, date_candidature, statut,
+                    priorite, notes, cv_path, photo_path, source, date_creation
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', candidates)
+            conn.executemany('''
+                INSERT INTO candidate_files (candidate_id, kind, path, size, mime, position)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', files)
+        done += count
+        if progress:
+            progress(done, rows)
+    with conn:
+        # Base de départ : pas d'historique de modifications
+        conn.execute("DELETE FROM candidate_changes")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.close()
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère une base de candidats synthétique.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("--output", default=None, help="fichier SQLite (défaut : candidates_<rows>.db)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=".", help="répertoire de la base et des fichiers (photos/, attachments/)")
+    args = parser.parse_args(argv)
+    os.makedirs(args.workdir, exist_ok=True)
+    os.chdir(args.workdir)
+    path = args.output or f"candidates_{args.rows}.db"
+    started = time.perf_counter()
+    generate_database(path, args.rows, args.seed, progress=lambda done, total: print(f"\r{done}/{total}", end="", file=sys.stderr))
+    print(f"\n{path} : {args.rows} candidats en {time.perf_counter() - started:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
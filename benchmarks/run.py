@@ -0,0 +1,277 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import ROOT
+from benchmarks.generate import generate_database
+
+# Rendu Qt sans affichage (refresh_table, miniatures)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+DEFAULT_SIZES = [10000, 100000]
+IMPORT_ROWS = 10000
+# Écart à partir duquel --compare signale une régression
+REGRESSION_RATIO = 1.2
+
+
+def measure(fn, repeat):
+    # Temps en millisecondes ; le premier passage (cache froid) est gardé à part
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "first_ms": round(times[0], 3),
+        "min_ms": round(min(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "max_ms": round(max(times), 3),
+        "runs": repeat,
+    }
+
+
+def bench_database(db, size, repeat):
+    import pandas as pd
+    from candidature_core import ChangeWatcher
+    middle = size // 2
+    ids = list(range(middle, middle + 200))
+    text = {"texte": "dupont motivé"}
+    cases = {
+        "authenticate": lambda: db.authenticate("admin", "admin"),
+        "get_candidate_by_id": lambda: db.get_candidate_by_id(middle),
+        "get_candidate_files": lambda: db.get_candidate_files(middle),
+        "list_candidates_page": lambda: db.list_candidates_page(),
+        "list_candidates_page_deep": lambda: db.list_candidates_page(after_id=size // 10),
+        "list_candidates_page_statut": lambda: db.list_candidates_page({"statut": "Accepté"}),
+        "list_candidates_page_3_filtres": lambda: db.list_candidates_page(
+            {"statut": "Entretien", "priorite": "Haute", "source": "Indeed"}),
+        "list_candidates_page_texte": lambda: db.list_candidates_page(text),
+        "list_candidates_by_ids": lambda: db.list_candidates_by_ids(ids),
+        "search_candidates": lambda: db.search_candidates({"statut": "Accepté", "priorite": "Urgente"}),
+        "search_text": lambda: db.search_text("dupont"),
+        "count_candidates": lambda: db.count_candidates({}),
+        "count_candidates_statut": lambda: db.count_candidates({"statut": "Accepté"}),
+        "count_candidates_2_filtres": lambda: db.count_candidates({"statut": "Accepté", "priorite": "Haute"}),
+        "count_candidates_texte": lambda: db.count_candidates(text),
+        "get_stats": db.get_stats,
+        "get_breakdown": db.get_breakdown,
+        "get_file_stats": db.get_file_stats,
+        "orphan_files": db.orphan_files,
+        "check_query_plans": db.check_query_plans,
+    }
+    results = {name: measure(fn, repeat) for name, fn in cases.items()}
+    # Parcours complets : une seule fois
+    results["iter_candidates"] = measure(lambda: sum(1 for _ in db.iter_candidates()), 1)
+    results["get_all_candidates"] = measure(db.get_all_candidates, 1)
+
+    watcher = ChangeWatcher(db)
+    results["change_watcher_poll_idle"] = measure(watcher.poll, repeat * 10)
+
+    # Écritures, sur des lignes propres au benchmark
+    counter = iter(range(10 ** 9))
+
+    def add():
+        n = next(counter)
+        db.add_candidate((f"Bench {n}", "Testeur", f"bench{n}@exemple.fr", "", "2024-01-01",
+                          "En attente", "Basse", "", None, [], None, "Autre"))
+
+    results["add_candidate"] = measure(add, repeat)
+    results["update_statut"] = measure(lambda: db.update_statut(middle, "Entretien"), repeat)
+    results["update_candidates_300"] = measure(
+        lambda: db.update_candidates([(i, "priorite", "Haute") for i in range(middle, middle + 300)]), repeat)
+    frame = pd.DataFrame({
+        "Nom": [f"Lot {i}" for i in range(2000)], "Poste": "Testeur",
+        "Email": [f"lot{i}@exemple.fr" for i in range(2000)], "Téléphone": "", "Date": "2024-01-01",
+        "Statut": "En attente", "Priorité": "Basse", "Notes": "",
+    })
+    results["bulk_add_candidates_2000"] = measure(lambda: db.bulk_add_candidates(frame), 1)
+    results["delete_candidates_300"] = measure(lambda: db.delete_candidates(range(size - 300, size)), 1)
+    watcher.close()
+    return results
+
+
+def bench_refresh_table(db, repeat):
+    # refresh_table jusqu'à l'affichage de la première page et du total,
+    # puis le décodage des miniatures de cette page
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QApplication
+    from candidature_manager import CandidatesModel, ModernCandidatesTable
+    app = QApplication.instance() or QApplication([])
+    table = ModernCandidatesTable(db)
+    model = table.model
+
+    def wait_loaded():
+        while model._fetching or not table.count_label.text():
+            app.processEvents()
+            time.sleep(0.0005)
+
+    def refresh(filters):
+        table.count_label.setText("")
+        table.refresh_table(filters)
+        wait_loaded()
+
+    def thumbnails():
+        # Jusqu'à l'arrivée de toutes les miniatures (générées dans le pool)
+        for row in range(model.rowCount()):
+            model.data(model.index(row, CandidatesModel.COL_PHOTO), Qt.DecorationRole)
+        while model._thumbs_pending:
+            app.processEvents()
+            time.sleep(0.0005)
+
+    wait_loaded()
+    results = {
+        "refresh_table": measure(lambda: refresh(None), repeat),
+        "refresh_table_statut": measure(lambda: refresh({"statut": "Entretien"}), repeat),
+        "refresh_table_texte": measure(lambda: refresh({"texte": "martin"}), repeat),
+    }
+    refresh(None)
+    results["thumbnails_first_page"] = measure(thumbnails, repeat)
+    # La table ne doit plus recevoir les écritures des benchmarks suivants
+    model.notifier.close()
+    table.executor.shutdown()
+    table.deleteLater()
+    app.processEvents()
+    return results
+
+
+def write_import_file(path, rows, offset):
+    import pandas as pd
+    frame = pd.DataFrame({
+        "Nom": [f"Import {offset + i}" for i in range(rows)], "Poste": "Comptable",
+        "Email": [f"import{offset + i}@exemple.fr" for i in range(rows)], "Téléphone": "0600000000",
+        "Date": "2024-03-01", "Statut": "En attente", "Priorité": "Moyenne",
+        "Notes": "Candidature reçue par le site", "Source": "Site Web",
+    })
+    if path.endswith(".csv"):
+        frame.to_csv(path, index=False, encoding="utf-8-sig")
+    else:
+        frame.to_excel(path, index=False)
+
+
+def bench_files(db, workdir):
+    import export_engine
+    import import_pipeline
+    import pdf_export
+    results = {}
+    for number, ext in enumerate((".csv", ".xlsx")):
+        path = os.path.join(workdir, f"import{ext}")
+        write_import_file(path, IMPORT_ROWS, number * IMPORT_ROWS)
+        results[f"import_{ext[1:]}_{IMPORT_ROWS}"] = measure(lambda: import_pipeline.import_file(db, path), 1)
+    for fmt in ("csv", "xlsx", "parquet"):
+        path = os.path.join(workdir, f"export.{fmt}")
+        if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            results[f"export_{fmt}"] = {"skipped": "pyarrow absent"}
+            continue
+        results[f"export_{fmt}"] = measure(lambda: export_engine.export_candidates(db, path), 1)
+    sheet_id = db.list_candidates_page(page_size=1)[0][0][0]
+    results["pdf_export_candidate"] = measure(
+        lambda: pdf_export.export_candidate(db, sheet_id, os.path.join(workdir, "fiche.pdf")), 3)
+    filters = {"statut": "Accepté", "priorite": "Urgente"}
+    results["pdf_export_sheets_merged"] = measure(
+        lambda: pdf_export.export_sheets(db, filters, merged_path=os.path.join(workdir, "fiches.pdf")), 1)
+    results["pdf_export_sheets_merged"]["sheets"] = db.count_candidates(filters)
+    return results
+
+
+def prepare(size, workdir, seed):
+    # Base générée une fois par taille, puis copiée : chaque passage part du même état
+    template = os.path.join(workdir, f"template_{size}_{seed}.db")
+    if not os.path.exists(template):
+        print(f"Génération de {size} candidats...", file=sys.stderr)
+        generate_database(template, size, seed, workdir)
+    path = os.path.join(workdir, f"bench_{size}.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    shutil.copyfile(template, path)
+    return path
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(baseline, current):
+    # Lignes (taille, mesure, avant, après, rapport) des médianes comparables
+    rows = []
+    for size, cases in current["results"].items():
+        for name, result in cases.items():
+            before = baseline.get("results", {}).get(size, {}).get(name, {}).get("median_ms")
+            after = result.get("median_ms")
+            if before and after:
+                rows.append((size, name, before, after, after / before))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure les performances de l'application sur des bases synthétiques.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="nombres de candidats (ex. 10000 100000 1000000)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "candidature_bench"))
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="résultats JSON d'une version précédente")
+    parser.add_argument("--no-gui", action="store_true", help="sans refresh_table (Qt)")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    os.makedirs(args.workdir, exist_ok=True)
+    # photos/, attachments/ et miniatures créés dans le répertoire de travail
+    os.chdir(args.workdir)
+    from candidature_core import DatabaseManager
+
+    report = {"meta": metadata(), "results": {}}
+    for size in args.sizes:
+        db = DatabaseManager(prepare(size, args.workdir, args.seed))
+        results = {}
+        if not args.no_gui:
+            results.update(bench_refresh_table(db, args.repeat))
+        results.update(bench_database(db, size, args.repeat))
+        results.update(bench_files(db, args.workdir))
+        db.close()
+        report["results"][str(size)] = results
+        for name, result in results.items():
+            print(f"{size:>8} {name:<36} {result.get('median_ms', '-'):>10} ms", file=sys.stderr)
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Résultats : {output}", file=sys.stderr)
+
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = 0
+        for size, name, before, after, ratio in compare(baseline, report):
+            flag = "  RÉGRESSION" if ratio > REGRESSION_RATIO else ""
+            regressions += bool(flag)
+            print(f"{size:>8} {name:<36} {before:>10.3f} -> {after:>10.3f} ms  x{ratio:.2f}{flag}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+
+from candidature_core import ATTACH_DIR, DB_NAME, PHOTO_DIR, DatabaseManager
+from profiling import profiler
+
+# Options de filtre (export, pdf-batch) -> clés de DatabaseManager.filter_clause
+FILTER_OPTIONS = {
+    "texte": "texte", "nom": "nom_complet", "poste": "poste_demande", "email": "email",
+    "statut": "statut", "priorite": "priorite", "source": "source",
+}
+# Code de sortie d'une tâche interrompue (Ctrl-C, SIGTERM)
+INTERRUPTED = 130
+
+
+class Progress:
+    # Rappel progress(fait, total) des tâches : avancement sur la sortie d'erreur
+    # (terminal uniquement) et arrêt propre au prochain lot après SIGINT/SIGTERM.
+    # Un second Ctrl-C interrompt immédiatement.
+    def __init__(self, label, verbose):
+        self.label = label
+        self.verbose = verbose
+        self.stopped = False
+        self.last = 0
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+    def stop(self, signum, frame):
+        if self.stopped:
+            raise KeyboardInterrupt
+        self.stopped = True
+        print("\nArrêt demandé, fin du lot en cours...", file=sys.stderr)
+
+    def __call__(self, done, total):
+        now = time.monotonic()
+        if self.verbose and now - self.last >= 0.5:
+            self.last = now
+            print(f"\r{self.label} : {done}" + (f"/{total}" if total else ""), end="", file=sys.stderr, flush=True)
+        return not self.stopped
+
+    def close(self):
+        if self.verbose and self.last:
+            print(file=sys.stderr)
+
+
+def filters_from(args):
+    return {key: getattr(args, option) for option, key in FILTER_OPTIONS.items() if getattr(args, option)}
+
+
+def print_json(data):
+    json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+
+def cmd_import(db, args):
+    import import_pipeline
+    progress = Progress("Import", args.verbose)
+    try:
+        report = import_pipeline.import_file(db, args.fichier, batch_size=args.lot, progress=progress)
+    finally:
+        progress.close()
+    if args.json:
+        print_json(report)
+    else:
+        if report["resumed_from"]:
+            print(f"Reprise à la ligne {report['resumed_from'] + 2}.")
+        print(
+            f"{report['inserted']} ajouté(s), {report['skipped']} doublon(s) ignoré(s), "
+            f"{report['invalid']} ligne(s) invalide(s) sur {report['rows_done']} ligne(s)."
+        )
+        for line, reason in report["errors"][:20]:
+            print(f"Ligne {line} : {reason}", file=sys.stderr)
+    if not report["completed"]:
+        print("Import interrompu : relancez la même commande pour reprendre.", file=sys.stderr)
+        return INTERRUPTED
+    return 0
+
+
+def cmd_export(db, args):
+    import export_engine
+    progress = Progress("Export", args.verbose)
+    try:
+        count = export_engine.export_candidates(db, args.fichier, filters_from(args), args.format, progress=progress)
+    finally:
+        progress.close()
+    if count is None:
+        print("Export interrompu, fichier supprimé.", file=sys.stderr)
+        return INTERRUPTED
+    print(f"{count} candidat(s) exporté(s) vers {args.fichier}")
+    return 0
+
+
+def cmd_stats(db, args):
+    stats = db.get_stats()
+    if args.fichiers:
+        stats["fichiers"] = db.get_file_stats()
+    if args.json:
+        print_json(stats)
+        return 0
+    print(f"Candidats : {stats['total']}")
+    for title, key in (("Statut", "par_statut"), ("Priorité", "par_priorite"), ("Source", "par_source")):
+        print(f"\n{title}")
+        for value, total in sorted(stats[key].items(), key=lambda item: -item[1]):
+            print(f"  {value or '(vide)':<20} {total:>10}")
+    if args.fichiers:
+        print("\nFichiers")
+        for kind, values in stats["fichiers"]["par_type"].items():
+            print(f"  {kind:<20} {values['fichiers']:>10} {values['octets'] / 1e6:>10.1f} Mo")
+        print(f"  {'sans CV':<20} {stats['fichiers']['sans_cv']:>10}")
+    return 0
+
+
+def cmd_pdf_batch(db, args):
+    import pdf_export
+    progress = Progress("Fiches", args.verbose)
+    try:
+        count = pdf_export.export_sheets(
+            db, filters_from(args), directory=args.dossier, merged_path=args.fichier,
+            workers=args.processus, progress=progress,
+        )
+    finally:
+        progress.close()
+    if count is None:
+        print("Génération interrompue.", file=sys.stderr)
+        return INTERRUPTED
+    print(f"{count} fiche(s) générée(s) dans {args.dossier or args.fichier}")
+    return 0
+
+
+def cmd_vacuum(db, args):
+    if args.fichiers:
+        from file_store import FileStore
+        # Chemins du stockage relatifs au dossier de l'application, celui de la base
+        base = os.path.dirname(os.path.abspath(db.path))
+        removed = sum(FileStore(root, db, base=base).collect_garbage(args.delai) for root in (ATTACH_DIR, PHOTO_DIR))
+        print(f"{removed} fichier(s) orphelin(s) supprimé(s)")
+    before, after = db.vacuum()
+    print(f"Base compactée : {before / 1e6:.1f} Mo -> {after / 1e6:.1f} Mo")
+    return 0
+
+
+def cmd_check_plans(db, args):
+    problems = db.check_query_plans()
+    for query, filters, details in problems:
+        print(f"{query} {filters} : {'; '.join(details)}")
+    if not problems:
+        print("Toutes les requêtes utilisent un index, pour chaque combinaison de filtres.")
+    return 1 if problems else 0
+
+
+def add_filters(parser):
+    group = parser.add_argument_group("filtres")
+    for option in FILTER_OPTIONS:
+        group.add_argument(f"--{option}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="candidature_cli", description="Traitements par lots sur la base des candidatures, sans interface graphique.",
+    )
+    parser.add_argument("--db", default=DB_NAME, help=f"base SQLite (défaut : {DB_NAME})")
+    parser.add_argument("-q", "--quiet", dest="verbose", action="store_false", help="sans affichage de l'avancement")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("import", help="importe un fichier CSV ou Excel (reprise automatique)")
+    p.add_argument("fichier")
+    p.add_argument("--lot", type=int, default=2000, help="lignes par transaction")
+    p.add_argument("--json", action="store_true", help="rapport complet en JSON")
+    p.set_defaults(run=cmd_import)
+
+    p = commands.add_parser("export", help="exporte les candidats (csv, xlsx, parquet, arrow)")
+    p.add_argument("fichier")
+    p.add_argument("--format", help="format (défaut : extension du fichier)")
+    add_filters(p)
+    p.set_defaults(run=cmd_export)
+
+    p = commands.add_parser("stats", help="statistiques des candidatures")
+    p.add_argument("--fichiers", action="store_true", help="volume des fichiers joints")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(run=cmd_stats)
+
+    p = commands.add_parser("pdf-batch", help="fiches PDF des candidats filtrés")
+    target = p.add_mutually_exclusive_group(required=True)
+    target.add_argument("--dossier", help="un PDF par candidat dans ce dossier")
+    target.add_argument("--fichier", help="un seul PDF")
+    p.add_argument("--processus", type=int, help="processus de rendu (défaut : nombre de cœurs)")
+    add_filters(p)
+    p.set_defaults(run=cmd_pdf_batch)
+
+    p = commands.add_parser("vacuum", help="compacte la base et optimise l'index plein texte")
+    p.add_argument("--fichiers", action="store_true", help="supprime aussi les fichiers orphelins")
+    p.add_argument("--delai", type=int, default=3600, help="délai de grâce des fichiers orphelins (s)")
+    p.set_defaults(run=cmd_vacuum)
+
+    p = commands.add_parser("check-plans", help="vérifie que chaque combinaison de filtres utilise un index")
+    p.set_defaults(run=cmd_check_plans)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.verbose = args.verbose and sys.stderr.isatty()
+    if args.command != "import" and not os.path.exists(args.db):
+        print(f"Base introuvable : {args.db}", file=sys.stderr)
+        return 1
+    db = DatabaseManager(args.db)
+    if profiler.enable_from_env():
+        profiler.instrument(db)
+    try:
+        return args.run(db, args)
+    except (ValueError, OSError) as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return INTERRUPTED
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
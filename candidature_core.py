@@ -0,0 +1,985 @@
+import hashlib
+import mimetypes
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+DB_NAME = "candidates_modern.db"
+ATTACH_DIR = "attachments"
+PHOTO_DIR = "photos"
+EMAIL_PATTERN = r'^[^@]+@[^@]+\.[^@]+$'
+# Mots tels que découpés par le tokenizer unicode61 de l'index plein texte
+SEARCH_WORD = re.compile(r"[^\W_]+")
+# Formats de date acceptés à l'import après l'ISO (2024-02-03)
+IMPORT_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y")
+
+
+def fold_text(text):
+    # Minuscules sans accents, comme remove_diacritics de FTS5 ("Hélène" -> "helene")
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def parse_dates(values):
+    # Dates importées (textes) : ISO, cellules date d'Excel comprises, sinon
+    # jour/mois/année à la française. Chaque valeur est lue pour elle-même,
+    # sans dépendre de la première ligne du lot ; NaT si aucun format ne convient.
+    import pandas as pd
+    dates = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    for fmt in IMPORT_DATE_FORMATS:
+        missing = dates.isna()
+        if not missing.any():
+            break
+        dates[missing] = pd.to_datetime(values[missing], errors="coerce", format=fmt)
+    return dates
+
+
+class DatabaseManager:
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-16000",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA foreign_keys=ON",
+    )
+
+    # Entrées du journal candidate_changes conservées au démarrage
+    CHANGELOG_KEEP = 100000
+    # Excédent toléré avant de purger, pour ne pas écrire à chaque lancement
+    CHANGELOG_SLACK = 10000
+
+    def __init__(self, path=DB_NAME):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.init_database()
+
+    def connect(self):
+        # Une connexion persistante par thread, réglée une seule fois.
+        # Utilisée avec "with", elle valide/annule la transaction sans être fermée.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, cached_statements=256, check_same_thread=False)
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+    def add_listener(self, callback):
+        # callback(type, ids) après chaque écriture validée, dans le thread qui a
+        # écrit ; type vaut "inserted", "updated" ou "deleted"
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def notify(self, kind, ids):
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            callback(kind, list(ids))
+
+    def init_database(self):
+        conn = self.connect()
+        if conn.execute("PRAGMA user_version").fetchone()[0] < len(self.MIGRATIONS):
+            self.migrate(conn)
+        # Purge du journal seulement s'il dépasse nettement CHANGELOG_KEEP : un
+        # démarrage ordinaire ne fait que lire les bornes (clé primaire)
+        low, high = conn.execute("SELECT MIN(seq), MAX(seq) FROM candidate_changes").fetchone()
+        if high is not None and high - low >= self.CHANGELOG_KEEP + self.CHANGELOG_SLACK:
+            with conn:
+                conn.execute("DELETE FROM candidate_changes WHERE seq <= ?", (high - self.CHANGELOG_KEEP,))
+
+    def migrate(self, conn):
+        # Applique les étapes de MIGRATIONS au-delà de PRAGMA user_version, une
+        # transaction par étape : une étape interrompue est rejouée en entier au
+        # lancement suivant. BEGIN IMMEDIATE sérialise les postes qui démarrent
+        # ensemble, la version est relue une fois le verrou obtenu.
+        for number, step in enumerate(self.MIGRATIONS, 1):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("PRAGMA user_version").fetchone()[0] < number:
+                    step(self, conn.cursor())
+                    conn.execute(f"PRAGMA user_version = {number}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    # Étapes du schéma. Les bases antérieures à user_version (version 0) ont pu
+    # en recevoir une partie : chaque étape vérifie ce qui existe déjà.
+
+    def _schema_candidates(self, c):
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS candidates (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nom_complet TEXT NOT NULL,
+                poste_demande TEXT NOT NULL,
+                email TEXT NOT NULL UNIQUE,
+                telephone TEXT,
+                date_candidature TEXT NOT NULL,
+                statut TEXT NOT NULL,
+                priorite TEXT,
+                notes TEXT,
+                cv_path TEXT,
+                attachments TEXT,
+                photo_path TEXT,
+                source TEXT,
+                date_creation TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        columns = {row[1] for row in c.execute("PRAGMA table_info(candidates)")}
+        for col in ["cv_path", "attachments", "photo_path", "source"]:
+            if col not in columns:
+                c.execute(f"ALTER TABLE candidates ADD COLUMN {col} TEXT")
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL UNIQUE,
+                password TEXT NOT NULL,
+                role TEXT NOT NULL CHECK(role IN ('admin', 'user'))
+            )
+        ''')
+        c.execute('SELECT COUNT(*) FROM users')
+        if c.fetchone()[0] == 0:
+            pw = hashlib.sha256("admin".encode()).hexdigest()
+            c.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)', ('admin', pw, 'admin'))
+
+    def _schema_fts(self, c):
+        # Index plein texte (contenu externe) maintenu par triggers
+        c.execute("SELECT 1 FROM sqlite_master WHERE name='candidates_fts'")
+        fts_exists = c.fetchone() is not None
+        c.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+                nom_complet, poste_demande, email, notes,
+                content='candidates', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS candidates_fts_ai AFTER INSERT ON candidates BEGIN
+                INSERT INTO candidates_fts(rowid, nom_complet, poste_demande, email, notes)
+                VALUES (NEW.id, NEW.nom_complet, NEW.poste_demande, NEW.email, NEW.notes);
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS candidates_fts_ad AFTER DELETE ON candidates BEGIN
+                INSERT INTO candidates_fts(candidates_fts, rowid, nom_complet, poste_demande, email, notes)
+                VALUES ('delete', OLD.id, OLD.nom_complet, OLD.poste_demande, OLD.email, OLD.notes);
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS candidates_fts_au
+            AFTER UPDATE OF nom_complet, poste_demande, email, notes ON candidates BEGIN
+                INSERT INTO candidates_fts(candidates_fts, rowid, nom_complet, poste_demande, email, notes)
+                VALUES ('delete', OLD.id, OLD.nom_complet, OLD.poste_demande, OLD.email, OLD.notes);
+                INSERT INTO candidates_fts(rowid, nom_complet, poste_demande, email, notes)
+                VALUES (NEW.id, NEW.nom_complet, NEW.poste_demande, NEW.email, NEW.notes);
+            END
+        ''')
+        if not fts_exists:
+            c.execute("INSERT INTO candidates_fts(candidates_fts) VALUES('rebuild')")
+
+    def _schema_filter_indexes(self, c):
+        # Un index par combinaison de filtres d'égalité : chaque combinaison
+        # est servie déjà triée par id (rowid), sans tri temporaire.
+        for cols in [("statut",), ("priorite",), ("source",), ("statut", "priorite"),
+                     ("statut", "source"), ("priorite", "source"), ("statut", "priorite", "source")]:
+            c.execute(f"CREATE INDEX IF NOT EXISTS idx_candidates_{'_'.join(cols)} ON candidates({', '.join(cols)})")
+
+    def _schema_stats(self, c):
+        # Compteurs par statut/priorité/source tenus à jour par triggers
+        c.execute("SELECT 1 FROM sqlite_master WHERE name='candidate_stats'")
+        stats_exists = c.fetchone() is not None
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS candidate_stats (
+                dimension TEXT NOT NULL,
+                valeur TEXT NOT NULL,
+                total INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, valeur)
+            ) WITHOUT ROWID
+        ''')
+        incr = "".join(
+            f"INSERT INTO candidate_stats (dimension, valeur, total) VALUES ('{d}', COALESCE(NEW.{d}, ''), 1) "
+            f"ON CONFLICT(dimension, valeur) DO UPDATE SET total = total + 1;"
+            for d in self.STAT_DIMENSIONS
+        )
+        decr = "".join(
+            f"UPDATE candidate_stats SET total = total - 1 WHERE dimension = '{d}' AND valeur = COALESCE(OLD.{d}, '');"
+            for d in self.STAT_DIMENSIONS
+        )
+        dims = ", ".join(self.STAT_DIMENSIONS)
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS candidate_stats_ai AFTER INSERT ON candidates BEGIN {incr} END")
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS candidate_stats_ad AFTER DELETE ON candidates BEGIN {decr} END")
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS candidate_stats_au AFTER UPDATE OF {dims} ON candidates BEGIN {decr} {incr} END")
+        if not stats_exists:
+            for d in self.STAT_DIMENSIONS:
+                c.execute(f"INSERT INTO candidate_stats SELECT '{d}', COALESCE({d}, ''), COUNT(*) FROM candidates GROUP BY 2")
+
+    def _schema_import_jobs(self, c):
+        # Points de reprise des imports en flux (import_pipeline)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS import_jobs (
+                source TEXT PRIMARY KEY,
+                signature TEXT NOT NULL,
+                rows_done INTEGER NOT NULL DEFAULT 0,
+                inserted INTEGER NOT NULL DEFAULT 0,
+                skipped INTEGER NOT NULL DEFAULT 0,
+                invalid INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+
+    def _schema_stored_files(self, c):
+        # Index du stockage de fichiers (file_store) : un compteur de références
+        # par fichier, tenu par triggers depuis candidate_files
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS stored_files (
+                path TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                refcount INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Anciens compteurs calculés sur cv_path/photo_path/attachments
+        for name in ("stored_files_ai", "stored_files_ad", "stored_files_au"):
+            c.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    def _schema_candidate_files(self, c):
+        # Fichiers des candidats, une ligne par fichier (remplace la chaîne
+        # "a;b;c" de candidates.attachments, qui n'est plus alimentée)
+        c.execute("SELECT 1 FROM sqlite_master WHERE name='candidate_files'")
+        files_exist = c.fetchone() is not None
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS candidate_files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+                kind TEXT NOT NULL CHECK(kind IN ('cv', 'photo', 'attachment')),
+                path TEXT NOT NULL,
+                size INTEGER,
+                sha256 TEXT,
+                mime TEXT,
+                position INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        c.execute("CREATE INDEX IF NOT EXISTS idx_candidate_files_candidate ON candidate_files(candidate_id, kind, position)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_candidate_files_kind ON candidate_files(kind, size)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_candidate_files_path ON candidate_files(path)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_candidate_files_sha256 ON candidate_files(sha256)")
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS candidate_files_ai AFTER INSERT ON candidate_files BEGIN
+                UPDATE stored_files SET refcount = refcount + 1 WHERE path = NEW.path;
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS candidate_files_ad AFTER DELETE ON candidate_files BEGIN
+                UPDATE stored_files SET refcount = refcount - 1 WHERE path = OLD.path;
+            END
+        ''')
+        if not files_exist:
+            self._migrate_candidate_files(c)
+
+    def _schema_changelog(self, c):
+        # Journal des écritures sur candidates, lu par ChangeWatcher pour
+        # savoir quelles lignes relire quand un autre poste a écrit
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS candidate_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                candidate_id INTEGER NOT NULL,
+                kind TEXT NOT NULL
+            )
+        ''')
+        for event, kind, row in (("INSERT", "inserted", "NEW"), ("UPDATE", "updated", "NEW"), ("DELETE", "deleted", "OLD")):
+            c.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS candidate_changes_{kind} AFTER {event} ON candidates BEGIN
+                    INSERT INTO candidate_changes (candidate_id, kind) VALUES ({row}.id, '{kind}');
+                END
+            ''')
+
+    # Numéro de version = rang dans la liste : ne jamais réordonner ni retirer,
+    # seulement ajouter à la fin
+    MIGRATIONS = (
+        _schema_candidates,
+        _schema_fts,
+        _schema_filter_indexes,
+        _schema_stats,
+        _schema_import_jobs,
+        _schema_stored_files,
+        _schema_candidate_files,
+        _schema_changelog,
+    )
+
+    def authenticate(self, username, password):
+        pw = hashlib.sha256(password.encode()).hexdigest()
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("SELECT role FROM users WHERE username=? AND password=?", (username, pw))
+            result = c.fetchone()
+            return result[0] if result else None
+
+    def add_user(self, username, password, role):
+        pw = hashlib.sha256(password.encode()).hexdigest()
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)', (username, pw, role))
+            conn.commit()
+
+    def change_password(self, username, old_password, new_password):
+        # False si l'ancien mot de passe est incorrect
+        old_hash = hashlib.sha256(old_password.encode()).hexdigest()
+        new_hash = hashlib.sha256(new_password.encode()).hexdigest()
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("UPDATE users SET password=? WHERE username=? AND password=?", (new_hash, username, old_hash))
+            return c.rowcount > 0
+
+    def _migrate_candidate_files(self, c):
+        # Reprise unique des chemins enregistrés dans candidates avant candidate_files
+        c.execute('''
+            SELECT id, cv_path, photo_path, attachments FROM candidates
+            WHERE cv_path IS NOT NULL OR photo_path IS NOT NULL OR attachments IS NOT NULL
+        ''')
+        for candidate_id, cv_path, photo_path, attachments in c.fetchall():
+            files = [("cv", cv_path), ("photo", photo_path)]
+            files += [("attachment", path) for path in (attachments or "").split(";")]
+            self._add_files(c, candidate_id, files)
+        # Les triggers ont déjà compté ces fichiers depuis candidates : recalcul complet
+        c.execute('''
+            UPDATE stored_files SET refcount = (
+                SELECT COUNT(*) FROM candidate_files f WHERE f.path = stored_files.path
+            )
+        ''')
+        c.execute("UPDATE candidates SET attachments = NULL WHERE attachments IS NOT NULL")
+
+    @staticmethod
+    def _add_files(c, candidate_id, files):
+        # files : [(type, chemin)] ; taille et empreinte reprises de stored_files si connues
+        rows = []
+        positions = {}
+        for kind, path in files:
+            path = (path or "").strip()
+            if not path:
+                continue
+            c.execute("SELECT size, sha256 FROM stored_files WHERE path = ?", (path,))
+            known = c.fetchone()
+            if known:
+                size, sha256 = known
+            else:
+                size, sha256 = (os.path.getsize(path) if os.path.isfile(path) else None), None
+            position = positions.get(kind, 0)
+            positions[kind] = position + 1
+            rows.append((candidate_id, kind, path, size, sha256, mimetypes.guess_type(path)[0], position))
+        c.executemany('''
+            INSERT INTO candidate_files (candidate_id, kind, path, size, sha256, mime, position)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+    # Champs texte des filtres -> colonne de l'index plein texte ("texte" = toutes)
+    FTS_FILTERS = {
+        "texte": None,
+        "nom_complet": "nom_complet",
+        "poste_demande": "poste_demande",
+        "email": "email",
+    }
+
+    @staticmethod
+    def fts_match(text, column=None):
+        # Chaque mot devient un préfixe ("hel" trouve "Hélène"), tous requis
+        terms = " ".join(f'"{word}"*' for word in SEARCH_WORD.findall(text))
+        if not terms:
+            return None
+        return f"{column} : ({terms})" if column else f"({terms})"
+
+    # Filtres d'égalité de ModernCandidatesTable.get_filters
+    EQUALITY_FILTERS = ("statut", "priorite", "source")
+    STAT_DIMENSIONS = ("statut", "priorite", "source")
+
+    def filter_clause(self, filters):
+        where = ["1=1"]
+        params = []
+        matches = []
+        for key, column in self.FTS_FILTERS.items():
+            if filters.get(key):
+                match = self.fts_match(filters[key], column)
+                if match:
+                    matches.append(match)
+        if matches:
+            where.append("id IN (SELECT rowid FROM candidates_fts WHERE candidates_fts MATCH ?)")
+            params.append(" AND ".join(matches))
+        for key in self.EQUALITY_FILTERS:
+            if filters.get(key):
+                where.append(f"{key} = ?")
+                params.append(filters[key])
+        return " AND ".join(where), params
+
+    # Projections des listes : (nom, expression SQL). La grille ne reçoit qu'un
+    # aperçu des notes et le nombre de pièces jointes ; la fiche complète est
+    # lue à la demande par get_candidate_by_id.
+    NOTES_PREVIEW = 80
+    ATTACHMENT_COUNT = (
+        "(SELECT COUNT(*) FROM candidate_files cf WHERE cf.candidate_id = candidates.id AND cf.kind = 'attachment')"
+    )
+    LIST_FIELDS = (
+        ("id", "candidates.id"),
+        ("nom_complet", "candidates.nom_complet"),
+        ("poste_demande", "candidates.poste_demande"),
+        ("email", "candidates.email"),
+        ("telephone", "candidates.telephone"),
+        ("date_candidature", "candidates.date_candidature"),
+        ("statut", "candidates.statut"),
+        ("priorite", "candidates.priorite"),
+        ("source", "candidates.source"),
+        # Un caractère de plus que l'aperçu : la grille sait ainsi si la note est tronquée
+        ("apercu_notes", f"substr(candidates.notes, 1, {NOTES_PREVIEW + 1})"),
+        ("photo_path", "candidates.photo_path"),
+        ("cv_path", "candidates.cv_path"),
+        ("nb_pieces", ATTACHMENT_COUNT),
+        ("date_creation", "candidates.date_creation"),
+    )
+    # Exports : notes complètes, sans les chemins du stockage interne
+    EXPORT_FIELDS = (
+        ("id", "candidates.id"),
+        ("nom_complet", "candidates.nom_complet"),
+        ("poste_demande", "candidates.poste_demande"),
+        ("email", "candidates.email"),
+        ("telephone", "candidates.telephone"),
+        ("date_candidature", "candidates.date_candidature"),
+        ("statut", "candidates.statut"),
+        ("priorite", "candidates.priorite"),
+        ("source", "candidates.source"),
+        ("notes", "candidates.notes"),
+        ("nb_pieces", ATTACHMENT_COUNT),
+        ("date_creation", "candidates.date_creation"),
+    )
+
+    # Fiches PDF (pdf_export)
+    SHEET_FIELDS = (
+        ("id", "candidates.id"),
+        ("nom_complet", "candidates.nom_complet"),
+        ("poste_demande", "candidates.poste_demande"),
+        ("email", "candidates.email"),
+        ("telephone", "candidates.telephone"),
+        ("date_candidature", "candidates.date_candidature"),
+        ("statut", "candidates.statut"),
+        ("priorite", "candidates.priorite"),
+        ("source", "candidates.source"),
+        ("notes", "candidates.notes"),
+        ("photo_path", "candidates.photo_path"),
+    )
+
+    @staticmethod
+    def select_list(fields):
+        return ", ".join(expr for _, expr in fields)
+
+    def search_candidates(self, filters):
+        where, params = self.filter_clause(filters)
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute(f"SELECT {self.select_list(self.LIST_FIELDS)} FROM candidates WHERE {where} ORDER BY id DESC", params)
+            return c.fetchall()
+
+    def list_candidates_page(self, filters=None, after_id=None, page_size=200, fields=None):
+        # Pagination par curseur (dernier id vu) : coût constant quelle que soit la page.
+        # Renvoie (lignes, curseur suivant), le curseur vaut None sur la dernière page.
+        # fields : projection (LIST_FIELDS par défaut), l'id toujours en premier.
+        where, params = self.filter_clause(filters or {})
+        if after_id is not None:
+            where += " AND id < ?"
+            params.append(after_id)
+        params.append(page_size)
+        with self.connect() as conn:
+            c = conn.cursor()
+            columns = self.select_list(fields or self.LIST_FIELDS)
+            c.execute(f"SELECT {columns} FROM candidates WHERE {where} ORDER BY id DESC LIMIT ?", params)
+            rows = c.fetchall()
+        next_cursor = rows[-1][0] if len(rows) == page_size else None
+        return rows, next_cursor
+
+    def list_candidates_by_ids(self, ids, filters=None, fields=None):
+        # Lignes (LIST_FIELDS par défaut) des candidats donnés qui satisfont encore les filtres
+        rows = []
+        ids = list(ids)
+        with self.connect() as conn:
+            c = conn.cursor()
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                where, params = self.filter_clause(filters or {})
+                c.execute(
+                    f"SELECT {self.select_list(fields or self.LIST_FIELDS)} FROM candidates "
+                    f"WHERE {where} AND id IN ({','.join('?' * len(chunk))}) ORDER BY id DESC",
+                    params + chunk,
+                )
+                rows.extend(c.fetchall())
+        return rows
+
+    def iter_candidates(self, filters=None, page_size=1000, fields=None):
+        cursor = None
+        while True:
+            rows, cursor = self.list_candidates_page(filters, cursor, page_size, fields)
+            yield from rows
+            if cursor is None:
+                return
+
+    def count_candidates(self, filters=None):
+        filters = filters or {}
+        active = [k for k in self.EQUALITY_FILTERS if filters.get(k)]
+        text = any(filters.get(k) and self.fts_match(filters[k]) for k in self.FTS_FILTERS)
+        # Sans filtre texte et avec au plus un filtre d'égalité, les compteurs suffisent
+        if not text and len(active) <= 1:
+            breakdown = self.get_breakdown()
+            if not active:
+                return sum(breakdown["statut"].values())
+            return breakdown[active[0]].get(filters[active[0]], 0)
+        where, params = self.filter_clause(filters)
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute(f"SELECT COUNT(*) FROM candidates WHERE {where}", params)
+            return c.fetchone()[0]
+
+    def check_query_plans(self):
+        # Passe EXPLAIN QUERY PLAN sur chaque combinaison de filtres possible, pour
+        # les requêtes de list_candidates_page, count_candidates (quand les
+        # compteurs ne suffisent pas) et list_candidates_by_ids, et renvoie
+        # [(requête, filtres, détails)] de celles qui parcourent toute la table
+        # ou trient hors index.
+        samples = {"texte": "a", "statut": "En attente", "priorite": "Haute", "source": "LinkedIn"}
+        problems = []
+        keys = list(samples)
+        columns = self.select_list(self.LIST_FIELDS)
+        with self.connect() as conn:
+            c = conn.cursor()
+            for mask in range(2 ** len(keys)):
+                filters = {k: samples[k] for i, k in enumerate(keys) if mask & (1 << i)}
+                where, params = self.filter_clause(filters)
+                shapes = [
+                    ("list_candidates_by_ids",
+                     f"SELECT {columns} FROM candidates WHERE {where} AND id IN (?,?,?) ORDER BY id DESC",
+                     params + [1, 2, 3]),
+                ]
+                if filters:
+                    shapes.append(("list_candidates_page",
+                                   f"SELECT {columns} FROM candidates WHERE {where} ORDER BY id DESC LIMIT ?",
+                                   params + [200]))
+                if "texte" in filters or len(filters) >= 2:
+                    shapes.append(("count_candidates", f"SELECT COUNT(*) FROM candidates WHERE {where}", params))
+                for name, query, query_params in shapes:
+                    c.execute(f"EXPLAIN QUERY PLAN {query}", query_params)
+                    details = [row[3] for row in c.fetchall()]
+                    bad = [d for d in details if d.split()[:2] == ["SCAN", "candidates"] or "TEMP B-TREE" in d]
+                    if bad:
+                        problems.append((name, filters, bad))
+        return problems
+
+    def search_text(self, text, limit=50):
+        # Recherche plein texte classée par pertinence (bm25)
+        match = self.fts_match(text)
+        if not match:
+            return []
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute(f'''
+                SELECT {self.select_list(self.LIST_FIELDS)} FROM candidates_fts f JOIN candidates ON candidates.id = f.rowid
+                WHERE candidates_fts MATCH ? ORDER BY f.rank LIMIT ?
+            ''', (match, limit))
+            return c.fetchall()
+
+    def add_candidate(self, data):
+        result = self.add_candidates([data])[0]
+        if isinstance(result, str):
+            raise Exception(result)
+        return result
+
+    def add_candidates(self, datas):
+        # Plusieurs fiches du formulaire en une seule transaction ; data[9] : liste
+        # des pièces jointes, rangées dans candidate_files avec le CV et la photo.
+        # Une fiche refusée n'annule pas les autres : renvoie pour chacune son id
+        # ou le message d'erreur.
+        results = []
+        inserted = []
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("BEGIN IMMEDIATE")
+            for data in datas:
+                data = tuple(data)
+                cv_path, attachments, photo_path = data[8], data[9], data[10]
+                c.execute("SAVEPOINT fiche")
+                try:
+                    c.execute('''
+                        INSERT INTO candidates (
+                            nom_complet, poste_demande, email, telephone, date_candidature,
+                            statut, priorite, notes, cv_path, photo_path, source
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', data[:9] + data[10:])
+                    candidate_id = c.lastrowid
+                    self._add_files(c, candidate_id, [("cv", cv_path), ("photo", photo_path)]
+                                    + [("attachment", path) for path in attachments or []])
+                    results.append(candidate_id)
+                    inserted.append(candidate_id)
+                except sqlite3.IntegrityError:
+                    c.execute("ROLLBACK TO fiche")
+                    results.append("L'email existe déjà.")
+                except sqlite3.Error as e:
+                    c.execute("ROLLBACK TO fiche")
+                    results.append(str(e))
+                c.execute("RELEASE fiche")
+        if inserted:
+            self.notify("inserted", inserted)
+        return results
+
+    # En-têtes Excel/CSV -> colonnes de la table
+    IMPORT_COLUMNS = {
+        "Nom": "nom_complet", "Poste": "poste_demande", "Email": "email",
+        "Téléphone": "telephone", "Date": "date_candidature", "Statut": "statut",
+        "Priorité": "priorite", "Notes": "notes", "Source": "source",
+    }
+    REQUIRED_IMPORT_COLUMNS = {"Nom", "Poste", "Email", "Téléphone", "Date", "Statut", "Priorité", "Notes"}
+
+    def bulk_add_candidates(self, df, checkpoint=None):
+        # Validation vectorisée puis insertion en une seule transaction.
+        # Renvoie {"inserted": [...], "skipped": [...], "invalid": [(ligne, motif), ...]}
+        # avec les libellés d'index de df. checkpoint = (source, signature, lignes traitées)
+        # enregistre le point de reprise dans la même transaction.
+        import pandas as pd
+        missing = self.REQUIRED_IMPORT_COLUMNS - set(df.columns)
+        if missing:
+            raise ValueError(f"Colonnes obligatoires manquantes : {', '.join(sorted(missing))}")
+        rows = pd.DataFrame(index=df.index)
+        for col, field in self.IMPORT_COLUMNS.items():
+            values = df[col] if col in df.columns else pd.Series("", index=df.index)
+            rows[field] = values.where(values.notna(), "").astype(str).str.strip()
+        dates = parse_dates(rows["date_candidature"])
+        rows["date_candidature"] = dates.dt.strftime("%Y-%m-%d")
+        rows.loc[rows["statut"] == "", "statut"] = "En attente"
+
+        report = {"inserted": [], "skipped": [], "invalid": []}
+        checks = [
+            ((rows["nom_complet"] == "") | (rows["poste_demande"] == "") | (rows["email"] == ""),
+             "Nom, poste et email obligatoires"),
+            (~rows["email"].str.match(EMAIL_PATTERN), "Email invalide"),
+            (dates.isna(), "Date invalide"),
+        ]
+        invalid = pd.Series(False, index=rows.index)
+        for mask, reason in checks:
+            mask = mask & ~invalid
+            report["invalid"].extend((label, reason) for label in rows.index[mask])
+            invalid |= mask
+        duplicated = rows["email"].duplicated() & ~invalid
+        report["skipped"].extend(rows.index[duplicated])
+        rows = rows[~invalid & ~duplicated]
+
+        columns = list(self.IMPORT_COLUMNS.values())
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("BEGIN IMMEDIATE")
+            # Ids attribués après le dernier existant (AUTOINCREMENT, écriture verrouillée)
+            c.execute("SELECT COALESCE(MAX(id), 0) FROM candidates")
+            last_id = c.fetchone()[0]
+            emails = rows["email"].tolist()
+            existing = set()
+            for i in range(0, len(emails), 500):
+                chunk = emails[i:i + 500]
+                c.execute(f"SELECT email FROM candidates WHERE email IN ({','.join('?' * len(chunk))})", chunk)
+                existing.update(e for (e,) in c.fetchall())
+            known = rows["email"].isin(existing)
+            report["skipped"].extend(rows.index[known])
+            rows = rows[~known]
+            c.executemany(f'''
+                INSERT INTO candidates ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})
+                ON CONFLICT(email) DO NOTHING
+            ''', (tuple(v or None for v in row) for row in rows[columns].itertuples(index=False, name=None)))
+            report["inserted"].extend(rows.index)
+            c.execute("SELECT id FROM candidates WHERE id > ?", (last_id,))
+            new_ids = [i for (i,) in c.fetchall()]
+            if checkpoint:
+                source, signature, rows_done = checkpoint
+                c.execute('''
+                    INSERT INTO import_jobs (source, signature, rows_done, inserted, skipped, invalid)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(source) DO UPDATE SET
+                        signature = excluded.signature, rows_done = excluded.rows_done,
+                        inserted = inserted + excluded.inserted, skipped = skipped + excluded.skipped,
+                        invalid = invalid + excluded.invalid
+                ''', (source, signature, rows_done, len(report["inserted"]), len(report["skipped"]), len(report["invalid"])))
+        if new_ids:
+            self.notify("inserted", new_ids)
+        return report
+
+    def get_import_checkpoint(self, source, signature):
+        # Point de reprise d'un import interrompu, oublié si le fichier a changé
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("SELECT signature, rows_done, inserted, skipped, invalid FROM import_jobs WHERE source = ?", (source,))
+            row = c.fetchone()
+            if row and row[0] != signature:
+                c.execute("DELETE FROM import_jobs WHERE source = ?", (source,))
+                row = None
+        if not row:
+            return None
+        return dict(rows_done=row[1], inserted=row[2], skipped=row[3], invalid=row[4])
+
+    def clear_import_checkpoint(self, source):
+        with self.connect() as conn:
+            conn.execute("DELETE FROM import_jobs WHERE source = ?", (source,))
+
+    def get_all_candidates(self):
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute(f"SELECT {self.select_list(self.LIST_FIELDS)} FROM candidates ORDER BY id DESC")
+            return c.fetchall()
+
+    def get_candidate_by_id(self, candidate_id):
+        # Fiche complète (toutes les colonnes de candidates), notes entières comprises
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("SELECT * FROM candidates WHERE id=?", (candidate_id,))
+            return c.fetchone()
+
+    def get_candidate_files(self, candidate_id, kind=None):
+        # [(id, type, chemin, taille, sha256, mime)] dans l'ordre d'ajout
+        query = "SELECT id, kind, path, size, sha256, mime FROM candidate_files WHERE candidate_id = ?"
+        params = [candidate_id]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute(query + " ORDER BY kind, position", params)
+            return c.fetchall()
+
+    def list_files_by_candidates(self, candidate_ids, kind=None):
+        # [(candidat, id, type, chemin, taille, sha256, mime)] pour plusieurs candidats à la fois
+        rows = []
+        ids = list(candidate_ids)
+        with self.connect() as conn:
+            c = conn.cursor()
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                query = ("SELECT candidate_id, id, kind, path, size, sha256, mime FROM candidate_files "
+                         f"WHERE candidate_id IN ({','.join('?' * len(chunk))})")
+                params = list(chunk)
+                if kind:
+                    query += " AND kind = ?"
+                    params.append(kind)
+                c.execute(query + " ORDER BY candidate_id, kind, position", params)
+                rows.extend(c.fetchall())
+        return rows
+
+    def get_file_stats(self):
+        # Nombre et volume des fichiers par type, candidats sans CV
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM candidate_files GROUP BY kind")
+            par_type = {kind: {"fichiers": n, "octets": size} for kind, n, size in c.fetchall()}
+            c.execute('''
+                SELECT COUNT(*) FROM candidates WHERE NOT EXISTS (
+                    SELECT 1 FROM candidate_files cf WHERE cf.candidate_id = candidates.id AND cf.kind = 'cv'
+                )
+            ''')
+            return dict(par_type=par_type, sans_cv=c.fetchone()[0])
+
+    def update_statut(self, candidate_id, new_statut):
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("UPDATE candidates SET statut = ? WHERE id = ?", (new_statut, candidate_id))
+            conn.commit()
+        self.notify("updated", [candidate_id])
+
+    def update_priorite(self, candidate_id, new_priorite):
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("UPDATE candidates SET priorite = ? WHERE id = ?", (new_priorite, candidate_id))
+            conn.commit()
+        self.notify("updated", [candidate_id])
+
+    EDITABLE_FIELDS = ("statut", "priorite")
+
+    def update_candidates(self, changes):
+        # changes : [(id, champ, valeur)] écrits en une seule transaction. Une ligne
+        # refusée (candidat supprimé entre-temps, valeur interdite) n'annule pas
+        # les autres : renvoie {(id, champ): message} des échecs.
+        failures = {}
+        updated = []
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("BEGIN IMMEDIATE")
+            for candidate_id, field, value in changes:
+                if field not in self.EDITABLE_FIELDS:
+                    failures[(candidate_id, field)] = f"Champ non modifiable : {field}"
+                    continue
+                c.execute("SAVEPOINT ligne")
+                try:
+                    c.execute(f"UPDATE candidates SET {field} = ? WHERE id = ?", (value, candidate_id))
+                    if c.rowcount:
+                        updated.append(candidate_id)
+                    else:
+                        failures[(candidate_id, field)] = "Candidat introuvable"
+                except sqlite3.Error as e:
+                    c.execute("ROLLBACK TO ligne")
+                    failures[(candidate_id, field)] = str(e)
+                c.execute("RELEASE ligne")
+        if updated:
+            self.notify("updated", sorted(set(updated), reverse=True))
+        return failures
+
+    def delete_candidates(self, ids):
+        ids = list(ids)
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("BEGIN IMMEDIATE")
+            c.executemany("DELETE FROM candidates WHERE id = ?", [(i,) for i in ids])
+            deleted = c.rowcount
+        self.notify("deleted", ids)
+        return deleted
+
+    def delete_candidate(self, candidate_id):
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("DELETE FROM candidates WHERE id = ?", (candidate_id,))
+            conn.commit()
+        self.notify("deleted", [candidate_id])
+
+    def register_file(self, path, sha256, size):
+        with self.connect() as conn:
+            # Un fichier réutilisé repart pour un délai de grâce complet
+            conn.execute('''
+                INSERT INTO stored_files (path, sha256, size) VALUES (?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET created_at = CURRENT_TIMESTAMP
+            ''', (path, sha256, size))
+
+    def orphan_files(self, grace_seconds=3600):
+        # Fichiers sans référence, plus anciens que le délai de grâce (le temps
+        # qu'un formulaire en cours de saisie enregistre le candidat)
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute(
+                "SELECT path FROM stored_files WHERE refcount <= 0 AND created_at <= datetime('now', ?)",
+                (f"-{int(grace_seconds)} seconds",),
+            )
+            return [path for (path,) in c.fetchall()]
+
+    def forget_file(self, path):
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("DELETE FROM stored_files WHERE path = ? AND refcount <= 0", (path,))
+            return c.rowcount > 0
+
+    def vacuum(self):
+        # Maintenance hors activité : segments de l'index plein texte fusionnés,
+        # fichier reconstruit sans pages libres, journal WAL vidé. Renvoie la
+        # taille du fichier (octets) avant et après.
+        conn = self.connect()
+        before = os.path.getsize(self.path)
+        with conn:
+            conn.execute("INSERT INTO candidates_fts(candidates_fts) VALUES('optimize')")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return before, os.path.getsize(self.path)
+
+    def get_changes(self, since=None):
+        # Écritures du journal candidate_changes après le numéro since :
+        # {"seq": dernier numéro, "changes": [(type, ids)]}. Sans since, seulement
+        # le numéro courant (point de départ d'un client).
+        with self.connect() as conn:
+            c = conn.cursor()
+            if since is None:
+                c.execute("SELECT COALESCE(MAX(seq), 0) FROM candidate_changes")
+                return {"seq": c.fetchone()[0], "changes": []}
+            c.execute("SELECT seq, candidate_id, kind FROM candidate_changes WHERE seq > ? ORDER BY seq", (since,))
+            rows = c.fetchall()
+        return {"seq": rows[-1][0] if rows else since, "changes": collapse_changes(rows)}
+
+    def watcher(self):
+        return ChangeWatcher(self)
+
+    def get_breakdown(self):
+        # {dimension: {valeur: total}} lu depuis les compteurs, sans parcourir candidates
+        breakdown = {d: {} for d in self.STAT_DIMENSIONS}
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("SELECT dimension, valeur, total FROM candidate_stats WHERE total > 0")
+            for dimension, valeur, total in c.fetchall():
+                breakdown.setdefault(dimension, {})[valeur] = total
+        return breakdown
+
+    def get_stats(self):
+        breakdown = self.get_breakdown()
+        statuts = breakdown["statut"]
+        return dict(
+            total=sum(statuts.values()),
+            en_attente=statuts.get("En attente", 0),
+            entretien=statuts.get("Entretien", 0),
+            accepte=statuts.get("Accepté", 0),
+            refuse=statuts.get("Refusé", 0),
+            par_statut=statuts,
+            par_priorite=breakdown["priorite"],
+            par_source=breakdown["source"],
+        )
+
+
+def collapse_changes(rows):
+    # [(seq, id, type)] du journal -> [(type, ids)]. Un seul événement par
+    # candidat : suppression si c'est le dernier, sinon insertion s'il est
+    # nouveau, sinon mise à jour.
+    last, inserted = {}, set()
+    for _, candidate_id, kind in rows:
+        last[candidate_id] = kind
+        if kind == "inserted":
+            inserted.add(candidate_id)
+    deleted = [i for i, kind in last.items() if kind == "deleted"]
+    new = [i for i in last if i in inserted and last[i] != "deleted"]
+    updated = [i for i in last if i not in inserted and last[i] != "deleted"]
+    return [(kind, ids) for kind, ids in (("deleted", deleted), ("inserted", new), ("updated", updated)) if ids]
+
+
+class ChangeWatcher:
+    # Détecte les écritures faites par d'autres connexions (autres postes, import
+    # d'un collègue...). PRAGMA data_version, lu sur une connexion dédiée, ne
+    # change que lorsqu'une autre connexion a validé une écriture : tant qu'il
+    # est stable, poll() ne coûte qu'une lecture d'entier. Sinon le journal
+    # candidate_changes donne les candidats touchés depuis le dernier appel, qui
+    # sont signalés aux écouteurs de DatabaseManager.
+    def __init__(self, db):
+        self.db = db
+        self.conn = sqlite3.connect(db.path, timeout=30, check_same_thread=False)
+        self.version = self.data_version()
+        self.last_seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM candidate_changes").fetchone()[0]
+
+    def data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def poll(self):
+        # Renvoie [(type, ids)] des changements vus (vide si rien n'a été écrit)
+        version = self.data_version()
+        if version == self.version:
+            return []
+        self.version = version
+        rows = self.conn.execute(
+            "SELECT seq, candidate_id, kind FROM candidate_changes WHERE seq > ? ORDER BY seq", (self.last_seq,)
+        ).fetchall()
+        if not rows:
+            return []
+        self.last_seq = rows[-1][0]
+        changes = collapse_changes(rows)
+        for kind, ids in changes:
+            self.db.notify(kind, ids)
+        return changes
+
+    def close(self):
+        self.conn.close()
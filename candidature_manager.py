@@ -1,29 +1,35 @@
 import sys
-import sqlite3
 import re
 import os
-import shutil
-import hashlib
+import time
 from datetime import datetime
 
-import pandas as pd
+# Début du démarrage (rapport CANDIDATURE_DEMARRAGE)
+STARTED = time.perf_counter()
+
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QFormLayout, QLineEdit, QComboBox, QTextEdit, QTableWidget,
-    QTableWidgetItem, QPushButton, QLabel, QMessageBox, QTabWidget,
-    QHeaderView, QFileDialog, QDateEdit, QFrame, QDialog, QDialogButtonBox, QAction
+    QFormLayout, QLineEdit, QComboBox, QTextEdit, QTableView,
+    QPushButton, QLabel, QMessageBox, QTabWidget, QStyle, QStyleOptionButton,
+    QHeaderView, QFileDialog, QDateEdit, QFrame, QDialog, QDialogButtonBox, QAction,
+    QProgressDialog, QMenu, QAbstractItemView, QTableWidget, QTableWidgetItem
 )
-from PyQt5.QtCore import Qt, QDate, QTimer
-from PyQt5.QtGui import QPixmap
-
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from PyQt5.QtCore import Qt, QDate, QTimer, QAbstractTableModel, QModelIndex, QEvent, QRect, QSize, pyqtSignal
+from PyQt5.QtGui import QPixmap, QCursor
 
 from dashboard_widget import DashboardWidget
+import import_pipeline
+import export_engine
+import pdf_export
+from query_executor import QueryExecutor, ChangeNotifier, WriteQueue
+from thumbnail_cache import ThumbnailCache
+from file_store import FileStore
+from profiling import profiler, Phases
+from remote_database import ENV_SERVER, RemoteDatabase
+from candidature_core import (
+    ATTACH_DIR, PHOTO_DIR, EMAIL_PATTERN, SEARCH_WORD, fold_text, DatabaseManager,
+)
 
-DB_NAME = "candidates_modern.db"
-ATTACH_DIR = "attachments"
-PHOTO_DIR = "photos"
 if not os.path.exists(ATTACH_DIR):
     os.makedirs(ATTACH_DIR)
 if not os.path.exists(PHOTO_DIR):
@@ -57,7 +63,7 @@ QLineEdit, QComboBox, QTextEdit, QDateEdit {
 QLineEdit:focus, QComboBox:focus, QTextEdit:focus, QDateEdit:focus {
     border: 1.5px solid #4285f4;
 }
-QTableWidget {
+QTableView {
     background: #232629; 
     color: #e6e6e6; 
     gridline-color: #393c3f;
@@ -131,154 +137,6 @@ QToolTip {
 
 THEME_LIGHT = ""
 
-class DatabaseManager:
-    def __init__(self):
-        self.init_database()
-
-    def connect(self):
-        return sqlite3.connect(DB_NAME)
-
-    def init_database(self):
-        with self.connect() as conn:
-            c = conn.cursor()
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS candidates (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nom_complet TEXT NOT NULL,
-                    poste_demande TEXT NOT NULL,
-                    email TEXT NOT NULL UNIQUE,
-                    telephone TEXT,
-                    date_candidature TEXT NOT NULL,
-                    statut TEXT NOT NULL,
-                    priorite TEXT,
-                    notes TEXT,
-                    cv_path TEXT,
-                    attachments TEXT,
-                    photo_path TEXT,
-                    source TEXT,
-                    date_creation TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            for col in ["cv_path", "attachments", "photo_path", "source"]:
-                try:
-                    c.execute(f"ALTER TABLE candidates ADD COLUMN {col} TEXT")
-                except sqlite3.OperationalError:
-                    pass
-
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT NOT NULL UNIQUE,
-                    password TEXT NOT NULL,
-                    role TEXT NOT NULL CHECK(role IN ('admin', 'user'))
-                )
-            ''')
-            c.execute('SELECT COUNT(*) FROM users')
-            if c.fetchone()[0] == 0:
-                pw = hashlib.sha256("admin".encode()).hexdigest()
-                c.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)', ('admin', pw, 'admin'))
-            conn.commit()
-
-    def authenticate(self, username, password):
-        pw = hashlib.sha256(password.encode()).hexdigest()
-        with self.connect() as conn:
-            c = conn.cursor()
-            c.execute("SELECT role FROM users WHERE username=? AND password=?", (username, pw))
-            result = c.fetchone()
-            return result[0] if result else None
-
-    def add_user(self, username, password, role):
-        pw = hashlib.sha256(password.encode()).hexdigest()
-        with self.connect() as conn:
-            c = conn.cursor()
-            c.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)', (username, pw, role))
-            conn.commit()
-
-    def search_candidates(self, filters):
-        query = "SELECT * FROM candidates WHERE 1=1"
-        params = []
-        if filters.get("nom_complet"):
-            query += " AND nom_complet LIKE ?"
-            params.append(f"%{filters['nom_complet']}%")
-        if filters.get("poste_demande"):
-            query += " AND poste_demande LIKE ?"
-            params.append(f"%{filters['poste_demande']}%")
-        if filters.get("email"):
-            query += " AND email LIKE ?"
-            params.append(f"%{filters['email']}%")
-        if filters.get("statut"):
-            query += " AND statut = ?"
-            params.append(filters["statut"])
-        if filters.get("priorite"):
-            query += " AND priorite = ?"
-            params.append(filters["priorite"])
-        if filters.get("source"):
-            query += " AND source = ?"
-            params.append(filters["source"])
-        with self.connect() as conn:
-            c = conn.cursor()
-            c.execute(query, params)
-            return c.fetchall()
-
-    def add_candidate(self, data):
-        with self.connect() as conn:
-            c = conn.cursor()
-            try:
-                c.execute('''
-                    INSERT INTO candidates (
-                        nom_complet, poste_demande, email, telephone, date_candidature,
-                        statut, priorite, notes, cv_path, attachments, photo_path, source
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', data)
-                conn.commit()
-            except sqlite3.IntegrityError:
-                raise Exception("L'email existe déjà.")
-
-    def get_all_candidates(self):
-        with self.connect() as conn:
-            c = conn.cursor()
-            c.execute("SELECT * FROM candidates ORDER BY id DESC")
-            return c.fetchall()
-
-    def get_candidate_by_id(self, candidate_id):
-        with self.connect() as conn:
-            c = conn.cursor()
-            c.execute("SELECT * FROM candidates WHERE id=?", (candidate_id,))
-            return c.fetchone()
-
-    def update_statut(self, candidate_id, new_statut):
-        with self.connect() as conn:
-            c = conn.cursor()
-            c.execute("UPDATE candidates SET statut = ? WHERE id = ?", (new_statut, candidate_id))
-            conn.commit()
-
-    def update_priorite(self, candidate_id, new_priorite):
-        with self.connect() as conn:
-            c = conn.cursor()
-            c.execute("UPDATE candidates SET priorite = ? WHERE id = ?", (new_priorite, candidate_id))
-            conn.commit()
-
-    def delete_candidate(self, candidate_id):
-        with self.connect() as conn:
-            c = conn.cursor()
-            c.execute("DELETE FROM candidates WHERE id = ?", (candidate_id,))
-            conn.commit()
-
-    def get_stats(self):
-        with self.connect() as conn:
-            c = conn.cursor()
-            c.execute("SELECT COUNT(*) FROM candidates")
-            total = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM candidates WHERE statut='En attente'")
-            attente = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM candidates WHERE statut='Entretien'")
-            entretien = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM candidates WHERE statut='Accepté'")
-            accepte = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM candidates WHERE statut='Refusé'")
-            refuse = c.fetchone()[0]
-        return dict(total=total, en_attente=attente, entretien=entretien, accepte=accepte, refuse=refuse)
-
 from PyQt5.QtWidgets import QStyledItemDelegate
 
 class ComboBoxDelegate(QStyledItemDelegate):
@@ -300,6 +158,394 @@ class ComboBoxDelegate(QStyledItemDelegate):
     def setModelData(self, editor, model, index):
         model.setData(index, editor.currentText())
 
+class ButtonsDelegate(QStyledItemDelegate):
+    # Dessine des boutons dans la cellule au lieu de créer un widget par ligne.
+    # buttons_for(candidat) renvoie une liste de (texte, valeur, actif).
+    MARGIN = 4
+
+    def __init__(self, buttons_for, on_click, parent=None):
+        super().__init__(parent)
+        self.buttons_for = buttons_for
+        self.on_click = on_click
+
+    def _button_rects(self, option, index):
+        cand = index.data(Qt.UserRole)
+        if cand is None:
+            return []
+        fm = option.fontMetrics
+        x = option.rect.x() + self.MARGIN
+        rects = []
+        for text, value, enabled in self.buttons_for(cand):
+            width = fm.horizontalAdvance(text) + 16
+            rect = QRect(x, option.rect.y() + 3, width, option.rect.height() - 6)
+            rects.append((rect, text, value, enabled))
+            x += width + self.MARGIN
+        return rects
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        for rect, text, _, enabled in self._button_rects(option, index):
+            btn = QStyleOptionButton()
+            btn.rect = rect
+            btn.text = text
+            btn.state = QStyle.State_Enabled if enabled else QStyle.State_None
+            style.drawControl(QStyle.CE_PushButton, btn, painter, widget)
+
+    def sizeHint(self, option, index):
+        rects = self._button_rects(option, index)
+        if not rects:
+            return super().sizeHint(option, index)
+        width = rects[-1][0].right() - option.rect.x() + self.MARGIN
+        return QSize(width, option.fontMetrics.height() + 14)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            for rect, _, value, enabled in self._button_rects(option, index):
+                if enabled and rect.contains(event.pos()):
+                    # Différé : le clic peut recharger le modèle (suppression)
+                    QTimer.singleShot(0, lambda v=value: self.on_click(v))
+                    return True
+        return False
+
+class CandidatesModel(QAbstractTableModel):
+    # (en-tête, champ de DatabaseManager.LIST_FIELDS)
+    COLUMNS = [
+        ("ID", "id"), ("Nom", "nom_complet"), ("Poste", "poste_demande"), ("Email", "email"),
+        ("Téléphone", "telephone"), ("Date", "date_candidature"), ("Statut", "statut"),
+        ("Priorité", "priorite"), ("Source", "source"), ("Notes", "apercu_notes"), ("Photo", "photo_path"),
+        ("CV", "cv_path"), ("Pièces jointes", "nb_pieces"), ("Date Création", "date_creation"), ("Actions", None),
+    ]
+    # Position de chaque champ dans les lignes de list_candidates_page
+    FIELDS = {name: i for i, (name, _) in enumerate(DatabaseManager.LIST_FIELDS)}
+    COL_STATUT = 6
+    COL_PRIORITE = 7
+    COL_NOTES = 9
+    COL_PHOTO = 10
+    COL_CV = 11
+    COL_PIECES = 12
+    COL_ACTIONS = 14
+    BATCH_SIZE = 200
+    THUMB_SIZE = 40
+    # Au-delà, une requête paginée est plus rapide qu'un filtrage en mémoire
+    REFINE_LIMIT = 5000
+
+    error = pyqtSignal(str)
+
+    def __init__(self, db, executor, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.executor = executor
+        self.filters = {}
+        self._rows = []
+        self._cursor = None
+        self._exhausted = True
+        self._complete = False
+        self._fetching = False
+        self._folded = {}
+        self._deferred = []
+        # Mesure du refresh_table en cours (profiling.Phases), si actives
+        self.measure = None
+        self.thumbnails = ThumbnailCache(self.THUMB_SIZE)
+        # Miniatures en cours de génération : photo -> ids des candidats à repeindre
+        self._thumbs_pending = {}
+        self._thumbs_failed = set()
+        # Écritures appliquées ligne à ligne ; un lot plus gros qu'une page recharge
+        self.notifier = ChangeNotifier(db, self)
+        self.notifier.changed.connect(self.on_change)
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(300)
+        self.reload_timer.timeout.connect(self.reload)
+        self.write_queue = WriteQueue(executor, db.update_candidates, parent=self)
+        self.write_queue.failed.connect(self._revert)
+
+    def load(self, filters=None, refine=False):
+        # Avec refine, une recherche plus restrictive que la précédente (déjà
+        # entièrement chargée) est filtrée en mémoire ; renvoie True dans ce cas.
+        # Toute page encore en cours de chargement pour l'ancienne recherche est annulée.
+        filters = filters or {}
+        self.executor.cancel(("page", id(self)))
+        if refine and self._complete and len(self._rows) <= self.REFINE_LIMIT and self.narrows(self.filters, filters):
+            self.beginResetModel()
+            self._rows = self.refine(filters)
+            self.filters = filters
+            self.endResetModel()
+            return True
+        self.beginResetModel()
+        self.filters = filters
+        self._rows = []
+        self._folded = {}
+        self._cursor = None
+        self._exhausted = False
+        self._complete = False
+        self._fetching = False
+        self._deferred = []
+        self.endResetModel()
+        return False
+
+    def reload(self):
+        self.load(self.filters)
+        self.fetchMore()
+
+    def on_change(self, kind, ids):
+        if kind == "deleted":
+            self.apply_rows(ids, [])
+        elif kind == "inserted" and len(ids) > self.BATCH_SIZE:
+            # Import en cours : une seule relecture pour une rafale de lots
+            self.reload_timer.start()
+        else:
+            filters = self.filters
+            self.executor.submit(
+                self.db.list_candidates_by_ids, ids, filters,
+                on_result=lambda rows: self.apply_rows(ids, rows) if self.filters is filters else self.on_change(kind, ids),
+                on_error=lambda e: self.error.emit(f"Erreur de chargement : {e}"),
+            )
+
+    def position(self, candidate_id):
+        # Place de l'id dans les lignes, triées par id décroissant (recherche dichotomique)
+        lo, hi = 0, len(self._rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._rows[mid][0] > candidate_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, candidate_id):
+        pos = self.position(candidate_id)
+        if pos < len(self._rows) and self._rows[pos][0] == candidate_id:
+            return pos
+        return None
+
+    def loaded(self, candidate_id):
+        # Vrai si l'id tombe dans la plage déjà chargée (les suivantes viendront par fetchMore)
+        return self._exhausted or (self._cursor is not None and candidate_id > self._cursor)
+
+    def apply_rows(self, ids, rows):
+        # rows : lignes à jour parmi ids ; un id absent ne correspond plus (ou plus du tout).
+        # Une page en cours de lecture a pu précéder l'écriture : réappliqué à son arrivée.
+        if self._fetching:
+            self._deferred.append((ids, rows))
+        found = {row[0]: row for row in rows}
+        for candidate_id in ids:
+            row = found.get(candidate_id)
+            pos = self.find(candidate_id)
+            for key in self.TEXT_FILTER_FIELDS:
+                self._folded.pop((candidate_id, key), None)
+            if pos is not None and row is None:
+                self.beginRemoveRows(QModelIndex(), pos, pos)
+                del self._rows[pos]
+                self.endRemoveRows()
+            elif pos is not None:
+                self._rows[pos] = row
+                self.dataChanged.emit(self.index(pos, 0), self.index(pos, self.columnCount() - 1))
+            elif row is not None and self.loaded(candidate_id):
+                pos = self.position(candidate_id)
+                self.beginInsertRows(QModelIndex(), pos, pos)
+                self._rows.insert(pos, row)
+                self.endInsertRows()
+
+    # Champs couverts par chaque filtre texte / d'égalité. La recherche globale
+    # ("texte") porte aussi sur les notes, dont seul l'aperçu est chargé : elle
+    # n'est jamais affinée en mémoire.
+    TEXT_FILTER_FIELDS = {"nom_complet": ("nom_complet",), "poste_demande": ("poste_demande",), "email": ("email",)}
+    EQUALITY_FILTER_FIELDS = {"statut": "statut", "priorite": "priorite", "source": "source"}
+    SERVER_TEXT_FILTERS = ("texte",)
+
+    @classmethod
+    def narrows(cls, old, new):
+        # Vrai si toute ligne retenue par new l'est aussi par old : chaque mot
+        # de l'ancienne saisie est préfixe d'un mot de la nouvelle.
+        # La recherche globale n'est pas affinée en mémoire : toute modification,
+        # y compris un effacement, relance la requête.
+        for key in cls.SERVER_TEXT_FILTERS:
+            if (old.get(key) or "") != (new.get(key) or ""):
+                return False
+        for key in cls.TEXT_FILTER_FIELDS:
+            new_words = SEARCH_WORD.findall(fold_text(new.get(key) or ""))
+            for word in SEARCH_WORD.findall(fold_text(old.get(key) or "")):
+                if not any(w.startswith(word) for w in new_words):
+                    return False
+        return all(not old.get(k) or old.get(k) == new.get(k) for k in cls.EQUALITY_FILTER_FIELDS)
+
+    def refine(self, filters):
+        equal = [(self.FIELDS[field], filters[key]) for key, field in self.EQUALITY_FILTER_FIELDS.items() if filters.get(key)]
+        texts = []
+        for key, fields in self.TEXT_FILTER_FIELDS.items():
+            words = SEARCH_WORD.findall(fold_text(filters.get(key) or ""))
+            if words:
+                # Préfixe de mot : début de texte ou précédé d'un séparateur
+                fields = [self.FIELDS[f] for f in fields]
+                texts.append((key, fields, [re.compile(r"(?<![^\W_])" + re.escape(w)) for w in words]))
+        rows = []
+        for cand in self._rows:
+            if any(cand[field] != value for field, value in equal):
+                continue
+            for key, fields, patterns in texts:
+                folded = self._folded.get((cand[0], key))
+                if folded is None:
+                    folded = fold_text(" ".join(str(cand[f]) for f in fields if cand[f]))
+                    self._folded[(cand[0], key)] = folded
+                if not all(p.search(folded) for p in patterns):
+                    break
+            else:
+                rows.append(cand)
+        return rows
+
+    def candidate(self, row):
+        return self._rows[row]
+
+    @classmethod
+    def value(cls, cand, field):
+        return cand[cls.FIELDS[field]]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._fetching:
+            return
+        self._fetching = True
+        self.executor.submit(
+            self.db.list_candidates_page, self.filters, self._cursor, self.BATCH_SIZE,
+            key=("page", id(self)), on_result=self._on_page,
+            on_error=lambda e: self.error.emit(f"Erreur de chargement : {e}"),
+        )
+
+    def _on_page(self, page):
+        batch, self._cursor = page
+        self._fetching = False
+        if self._cursor is None:
+            self._exhausted = True
+            self._complete = True
+        self.mark("lecture")
+        if batch:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(batch) - 1)
+            self._rows.extend(batch)
+            self.endInsertRows()
+        deferred, self._deferred = self._deferred, []
+        for ids, rows in deferred:
+            self.apply_rows(ids, rows)
+        self.end_measure("modele")
+
+    def mark(self, phase):
+        if self.measure is not None:
+            self.measure.phase(phase)
+
+    def end_measure(self, phase):
+        # Les miniatures sont décodées au dessin qui suit : la mesure se termine
+        # au retour dans la boucle d'événements
+        measure = self.measure
+        if measure is not None:
+            measure.phase(phase)
+            QTimer.singleShot(0, lambda: self._finish_measure(measure))
+
+    def _finish_measure(self, measure):
+        if self.measure is measure:
+            self.measure = None
+            measure.finish(len(self._rows))
+
+    def request_thumbnail(self, photo, candidate_id):
+        # Miniature absente : décodée dans le pool, la cellule est repeinte à
+        # l'arrivée. Une photo illisible n'est demandée qu'une fois.
+        if photo in self._thumbs_failed:
+            return None
+        waiting = self._thumbs_pending.get(photo)
+        if waiting is not None:
+            waiting.add(candidate_id)
+            return None
+        self._thumbs_pending[photo] = {candidate_id}
+        self.executor.submit(
+            self.thumbnails.generate, photo,
+            on_result=lambda image: self._thumbnail_ready(photo, image),
+            on_error=lambda e: self._thumbnail_ready(photo, None),
+        )
+        return None
+
+    def _thumbnail_ready(self, photo, image):
+        ids = self._thumbs_pending.pop(photo, ())
+        if self.thumbnails.add(photo, image) is None:
+            self._thumbs_failed.add(photo)
+            return
+        for candidate_id in ids:
+            row = self.find(candidate_id)
+            if row is not None:
+                index = self.index(row, self.COL_PHOTO)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        cand = self._rows[index.row()]
+        col = index.column()
+        if role == Qt.UserRole:
+            return cand
+        if col == self.COL_PHOTO:
+            photo = self.value(cand, "photo_path")
+            if role == Qt.DecorationRole and photo:
+                if self.measure is None:
+                    return self.thumbnails.cached(photo) or self.request_thumbnail(photo, cand[0])
+                start = time.perf_counter()
+                pix = self.thumbnails.cached(photo) or self.request_thumbnail(photo, cand[0])
+                self.measure.add("miniatures", (time.perf_counter() - start) * 1000)
+                return pix
+            return None
+        if col in (self.COL_CV, self.COL_PIECES, self.COL_ACTIONS):
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            value = self.value(cand, self.COLUMNS[col][1])
+            if col == self.COL_NOTES and value and len(value) > DatabaseManager.NOTES_PREVIEW:
+                return value[:DatabaseManager.NOTES_PREVIEW] + "…"
+            return str(value) if value is not None else ""
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() in (self.COL_STATUT, self.COL_PRIORITE):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or index.column() not in (self.COL_STATUT, self.COL_PRIORITE):
+            return False
+        cand = list(self._rows[index.row()])
+        name = self.COLUMNS[index.column()][1]
+        previous = cand[self.FIELDS[name]]
+        # Mise à jour affichée tout de suite, écrite avec les suivantes par la
+        # file d'écriture et annulée si elle est refusée
+        cand[self.FIELDS[name]] = value
+        self._rows[index.row()] = tuple(cand)
+        self.dataChanged.emit(index, index)
+        self.write_queue.put(cand[0], name, value, previous)
+        return True
+
+    def _revert(self, failures):
+        for candidate_id, name, value, _ in failures:
+            row = self.find(candidate_id)
+            if row is not None:
+                cand = list(self._rows[row])
+                cand[self.FIELDS[name]] = value
+                self._rows[row] = tuple(cand)
+                col = next(i for i, (_, f) in enumerate(self.COLUMNS) if f == name)
+                self.dataChanged.emit(self.index(row, col), self.index(row, col))
+        details = "\n".join(f"Candidat {candidate_id} ({name}) : {message}" for candidate_id, name, _, message in failures[:10])
+        self.error.emit(f"Modification non enregistrée :\n{details}")
+
 class LoginDialog(QDialog):
     def __init__(self, db, parent=None):
         super().__init__(parent)
@@ -322,7 +568,12 @@ class LoginDialog(QDialog):
     def accept(self):
         username = self.username_input.text()
         password = self.password_input.text()
-        role = self.db.authenticate(username, password)
+        try:
+            role = self.db.authenticate(username, password)
+        except ConnectionError as e:
+            # Service partagé arrêté ou injoignable
+            QMessageBox.critical(self, "Erreur", f"Connexion à la base impossible : {e}")
+            return
         if role:
             self.role = role
             self.username = username
@@ -331,6 +582,8 @@ class LoginDialog(QDialog):
             QMessageBox.warning(self, "Erreur", "Identifiants invalides")
 
 class DropArea(QLabel):
+    files_dropped = pyqtSignal(list)
+
     def __init__(self, parent=None):
         super().__init__("Déposez vos fichiers ici", parent)
         self.setAcceptDrops(True)
@@ -342,13 +595,12 @@ class DropArea(QLabel):
             event.acceptProposedAction()
 
     def dropEvent(self, event):
-        for url in event.mimeData().urls():
-            path = url.toLocalFile()
-            if os.path.isfile(path):
-                dest = os.path.join(ATTACH_DIR, os.path.basename(path))
-                if not os.path.exists(dest):
-                    shutil.copy(path, dest)
-                self.dropped_files.append(dest)
+        # La copie est faite par le formulaire, hors du thread graphique
+        paths = [url.toLocalFile() for url in event.mimeData().urls()]
+        self.files_dropped.emit([p for p in paths if os.path.isfile(p)])
+
+    def add_file(self, path):
+        self.dropped_files.append(path)
         self.setText("\n".join(os.path.basename(f) for f in self.dropped_files))
 
     def clear_files(self):
@@ -358,11 +610,17 @@ class DropArea(QLabel):
 class ModernCandidateForm(QWidget):
     SOURCES = ["LinkedIn", "Email", "Indeed", "Site Web", "Recommandation", "Autre"]
 
-    def __init__(self, db, dashboard, table, parent=None):
+    def __init__(self, db, dashboard, table, executor=None, parent=None):
         super().__init__(parent)
         self.db = db
         self.dashboard = dashboard
         self.table = table
+        self.executor = executor or QueryExecutor(db, self)
+        self.thumbnails = ThumbnailCache(CandidatesModel.THUMB_SIZE)
+        self.attach_store = FileStore(ATTACH_DIR, db)
+        self.photo_store = FileStore(PHOTO_DIR, db)
+        self._pending_copies = 0
+        self._adding = False
         l = QVBoxLayout(self)
         form = QFormLayout()
         self.nom_input = QLineEdit()
@@ -386,6 +644,8 @@ class ModernCandidateForm(QWidget):
         self.cv_btn = QPushButton("Joindre un CV (PDF)")
         self.cv_btn.clicked.connect(self.select_cv)
         self.attach_area = DropArea()
+        self.attach_area.files_dropped.connect(self.store_attachments)
+        self.copy_label = QLabel("")
         self.attach_btn = QPushButton("Ajouter pièces jointes (dialog)")
         self.attach_btn.clicked.connect(self.select_attachments)
         self.source_input = QComboBox()
@@ -406,6 +666,7 @@ class ModernCandidateForm(QWidget):
         form.addRow("CV :", self.cv_btn)
         form.addRow("Pièces jointes (Drag & Drop):", self.attach_area)
         form.addRow("", self.attach_btn)
+        form.addRow("", self.copy_label)
 
         l.addLayout(form)
         self.btn = QPushButton("Ajouter le Candidat")
@@ -413,35 +674,68 @@ class ModernCandidateForm(QWidget):
         l.addWidget(self.btn)
         self.setLayout(l)
 
+    def store_file(self, fn, path, on_stored):
+        # Copie (ou dédoublonnage) dans le pool de threads, avec progression
+        name = os.path.basename(path)
+        self._pending_copies += 1
+        self.update_add_button()
+
+        def on_progress(done, total):
+            if total:
+                self.copy_label.setText(f"Copie de {name} : {100 * done // total} %")
+
+        def finish():
+            self._pending_copies -= 1
+            if not self._pending_copies:
+                self.copy_label.setText("")
+            self.update_add_button()
+
+        def on_result(dest):
+            finish()
+            on_stored(dest)
+
+        def on_error(error):
+            finish()
+            QMessageBox.warning(self, "Erreur", f"Copie de {name} impossible : {error}")
+
+        self.executor.submit(fn, path, on_result=on_result, on_error=on_error, on_progress=on_progress)
+
+    def update_add_button(self):
+        self.btn.setEnabled(not self._adding and not self._pending_copies)
+
+    def store_photo(self, path, progress=None):
+        dest = self.photo_store.put(path, progress)
+        # Miniature du tableau générée dès maintenant, une fois pour toutes
+        self.thumbnails.generate(dest)
+        return dest
+
     def select_photo(self):
         path, _ = QFileDialog.getOpenFileName(self, "Sélectionner la photo", "", "Images (*.png *.jpg *.jpeg)")
         if path:
-            dest = os.path.join(PHOTO_DIR, os.path.basename(path))
-            if not os.path.exists(dest):
-                shutil.copy(path, dest)
-            self.photo_path = dest
-            pix = QPixmap(dest)
-            self.photo_label.setPixmap(pix.scaled(80, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-            self.photo_label.setText("")
+            self.store_file(self.store_photo, path, self.set_photo)
+
+    def set_photo(self, dest):
+        self.photo_path = dest
+        pix = QPixmap(dest)
+        self.photo_label.setPixmap(pix.scaled(80, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        self.photo_label.setText("")
 
     def select_cv(self):
         path, _ = QFileDialog.getOpenFileName(self, "Sélectionner le CV", "", "PDF Files (*.pdf)")
         if path:
-            dest = os.path.join(ATTACH_DIR, os.path.basename(path))
-            if not os.path.exists(dest):
-                shutil.copy(path, dest)
-            self.cv_path = dest
-            self.cv_btn.setText(f"CV: {os.path.basename(path)}")
+            self.store_file(self.attach_store.put, path, self.set_cv)
+
+    def set_cv(self, dest):
+        self.cv_path = dest
+        self.cv_btn.setText(f"CV: {os.path.basename(dest)}")
 
     def select_attachments(self):
         files, _ = QFileDialog.getOpenFileNames(self, "Sélectionner les pièces jointes", "", "Fichiers (*.pdf *.jpg *.png *.jpeg *.doc *.docx *.xls *.xlsx)")
-        if files:
-            for path in files:
-                dest = os.path.join(ATTACH_DIR, os.path.basename(path))
-                if not os.path.exists(dest):
-                    shutil.copy(path, dest)
-                self.attach_area.dropped_files.append(dest)
-            self.attach_area.setText("\n".join(os.path.basename(f) for f in self.attach_area.dropped_files))
+        self.store_attachments(files)
+
+    def store_attachments(self, paths):
+        for path in paths:
+            self.store_file(self.attach_store.put, path, self.attach_area.add_file)
 
     def add_candidate(self):
         data = (
@@ -454,23 +748,32 @@ class ModernCandidateForm(QWidget):
             self.priorite_input.currentText(),
             self.notes_input.toPlainText(),
             self.cv_path,
-            ";".join(self.attach_area.dropped_files) if self.attach_area.dropped_files else None,
+            list(self.attach_area.dropped_files),
             self.photo_path,
             self.source_input.currentText()
         )
         if not all(data[:3]):
             QMessageBox.warning(self, "Champs obligatoires", "Remplissez nom, poste et email.")
             return
-        if not re.match(r'^[^@]+@[^@]+\.[^@]+$', data[2]):
+        if not re.match(EMAIL_PATTERN, data[2]):
             QMessageBox.warning(self, "Email", "Email invalide.")
             return
-        try:
-            self.db.add_candidate(data)
-        except Exception as e:
-            QMessageBox.warning(self, "Erreur", str(e))
-            return
+        self._adding = True
+        self.update_add_button()
+        self.executor.submit(
+            self.db.add_candidate, data, write=True,
+            on_result=lambda _: self.on_candidate_added(), on_error=self.on_add_failed,
+        )
+
+    def on_add_failed(self, error):
+        self._adding = False
+        self.update_add_button()
+        QMessageBox.warning(self, "Erreur", str(error))
+
+    def on_candidate_added(self):
+        self._adding = False
+        self.update_add_button()
         self.dashboard.refresh_stats()
-        self.table.refresh_table()
         self.nom_input.clear()
         self.poste_input.clear()
         self.email_input.clear()
@@ -484,12 +787,17 @@ class ModernCandidateForm(QWidget):
         self.photo_label.setText("Aucune photo")
 
 class ModernCandidatesTable(QWidget):
-    def __init__(self, db, user_role="user", parent=None):
+    def __init__(self, db, user_role="user", executor=None, parent=None):
         super().__init__(parent)
         self.db = db
         self.user_role = user_role
+        self.executor = executor or QueryExecutor(db, self)
         l = QVBoxLayout(self)
         filters_layout = QHBoxLayout()
+        self.filter_texte = QLineEdit()
+        self.filter_texte.setPlaceholderText("Recherche (nom, poste, email, notes)")
+        self.filter_texte.returnPressed.connect(self.apply_filters)
+        filters_layout.addWidget(self.filter_texte)
         self.filter_nom = QLineEdit()
         self.filter_nom.setPlaceholderText("Nom")
         filters_layout.addWidget(self.filter_nom)
@@ -512,31 +820,53 @@ class ModernCandidatesTable(QWidget):
         self.filter_source.addItems(ModernCandidateForm.SOURCES)
         filters_layout.addWidget(self.filter_source)
 
+        # Recherche à la frappe : relancée 250 ms après la dernière touche
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.apply_filters)
+        for field in (self.filter_texte, self.filter_nom, self.filter_poste, self.filter_email):
+            field.textChanged.connect(self.search_timer.start)
+        for combo in (self.filter_statut, self.filter_priorite, self.filter_source):
+            combo.currentIndexChanged.connect(self.search_timer.start)
+
         self.search_btn = QPushButton("Rechercher")
         self.search_btn.clicked.connect(self.apply_filters)
         filters_layout.addWidget(self.search_btn)
         self.reset_btn = QPushButton("Réinitialiser")
         self.reset_btn.clicked.connect(self.reset_filters)
         filters_layout.addWidget(self.reset_btn)
-        self.export_btn = QPushButton("Exporter Excel")
+        self.export_btn = QPushButton("Exporter")
         self.export_btn.clicked.connect(self.export_to_excel)
         filters_layout.addWidget(self.export_btn)
-        self.import_btn = QPushButton("Importer Excel")
+        self.pdf_btn = QPushButton("Fiches PDF")
+        self.pdf_btn.clicked.connect(self.export_pdf_batch)
+        filters_layout.addWidget(self.pdf_btn)
+        self.import_btn = QPushButton("Importer Excel/CSV")
         self.import_btn.clicked.connect(self.import_from_excel)
         filters_layout.addWidget(self.import_btn)
 
         l.addLayout(filters_layout)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(15)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Nom", "Poste", "Email", "Téléphone",
-            "Date", "Statut", "Priorité", "Source", "Notes", "Photo",
-            "CV", "Pièces jointes", "Date Création", "Actions"
-        ])
+        self.model = CandidatesModel(self.db, self.executor, self)
+        self.model.error.connect(lambda message: QMessageBox.warning(self, "Erreur", message))
+        self.model.notifier.changed.connect(lambda *_: self.update_count())
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.verticalHeader().setDefaultSectionSize(CandidatesModel.THUMB_SIZE + 4)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
         self.table.setColumnWidth(0, 40)
+        self.table.setColumnWidth(CandidatesModel.COL_PIECES, 110)
+        self.table.setColumnWidth(CandidatesModel.COL_ACTIONS, 160)
+        self.table.doubleClicked.connect(self.show_details)
+        # Sélection de plusieurs lignes, actions groupées au clic droit
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.table.customContextMenuRequested.connect(self.selection_menu)
         l.addWidget(self.table)
+        self.count_label = QLabel()
+        l.addWidget(self.count_label)
 
         self.statut_delegate = ComboBoxDelegate(
             ["En attente", "Entretien", "Accepté", "Refusé"], self.table
@@ -544,29 +874,125 @@ class ModernCandidatesTable(QWidget):
         self.priorite_delegate = ComboBoxDelegate(
             ["Basse", "Moyenne", "Haute", "Urgente"], self.table
         )
-        self.table.setItemDelegateForColumn(6, self.statut_delegate)
-        self.table.setItemDelegateForColumn(7, self.priorite_delegate)
+        self.cv_delegate = ButtonsDelegate(self.cv_buttons, self.open_file, self.table)
+        self.pieces_delegate = ButtonsDelegate(self.attachment_buttons, self.show_attachments, self.table)
+        self.actions_delegate = ButtonsDelegate(self.action_buttons, self.on_action, self.table)
+        self.table.setItemDelegateForColumn(CandidatesModel.COL_STATUT, self.statut_delegate)
+        self.table.setItemDelegateForColumn(CandidatesModel.COL_PRIORITE, self.priorite_delegate)
+        self.table.setItemDelegateForColumn(CandidatesModel.COL_CV, self.cv_delegate)
+        self.table.setItemDelegateForColumn(CandidatesModel.COL_PIECES, self.pieces_delegate)
+        self.table.setItemDelegateForColumn(CandidatesModel.COL_ACTIONS, self.actions_delegate)
 
-        self.table.itemChanged.connect(self.on_item_changed)
-        self._updating = False
         self.setLayout(l)
         self.refresh_table()
 
-    def on_item_changed(self, item):
-        if getattr(self, "_updating", False):
+    def cv_buttons(self, cand):
+        cv_path = self.model.value(cand, "cv_path")
+        return [("Voir CV", cv_path, True)] if cv_path else []
+
+    def attachment_buttons(self, cand):
+        # Seul le nombre de pièces jointes est chargé, la liste l'est au clic
+        count = self.model.value(cand, "nb_pieces")
+        return [(f"{count} fichier(s)", cand[0], True)] if count else []
+
+    def show_attachments(self, candidate_id):
+        pos = QCursor.pos()
+        self.executor.submit(
+            self.db.get_candidate_files, candidate_id, "attachment",
+            on_result=lambda files: self.attachments_menu(files, pos),
+            on_error=lambda e: QMessageBox.warning(self, "Erreur", str(e)),
+        )
+
+    def attachments_menu(self, files, pos):
+        menu = QMenu(self)
+        for _, _, path, _, _, _ in files:
+            action = menu.addAction(os.path.basename(path))
+            action.triggered.connect(lambda _, p=path: self.open_file(p))
+        menu.exec_(pos)
+
+    def show_details(self, index):
+        # Fiche complète (notes entières) lue à l'ouverture seulement
+        if index.column() in (CandidatesModel.COL_STATUT, CandidatesModel.COL_PRIORITE, CandidatesModel.COL_CV,
+                              CandidatesModel.COL_PIECES, CandidatesModel.COL_ACTIONS):
             return
-        row = item.row()
-        col = item.column()
-        if col in (6, 7):
-            candidate_id = self.table.item(row, 0).text()
-            new_value = item.text()
-            if col == 6:
-                self.db.update_statut(candidate_id, new_value)
-            elif col == 7:
-                self.db.update_priorite(candidate_id, new_value)
+        self.executor.submit(
+            self.db.get_candidate_by_id, self.model.candidate(index.row())[0], key=("detail", id(self)),
+            on_result=self.details_dialog, on_error=lambda e: QMessageBox.warning(self, "Erreur", str(e)),
+        )
+
+    def details_dialog(self, cand):
+        if not cand:
+            QMessageBox.warning(self, "Erreur", "Candidat introuvable")
+            return
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"Fiche Candidat : {cand[1]}")
+        layout = QFormLayout(dialog)
+        for label, value in (("Poste", cand[2]), ("Email", cand[3]), ("Téléphone", cand[4]), ("Date", cand[5]),
+                             ("Statut", cand[6]), ("Priorité", cand[7]), ("Source", cand[12])):
+            layout.addRow(label, QLabel(value or ""))
+        notes = QTextEdit(cand[8] or "")
+        notes.setReadOnly(True)
+        layout.addRow("Notes", notes)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+        dialog.exec_()
+
+    def selected_ids(self):
+        return [self.model.candidate(index.row())[0] for index in self.table.selectionModel().selectedRows()]
+
+    def selection_menu(self, pos):
+        ids = self.selected_ids()
+        if not ids:
+            return
+        menu = QMenu(self)
+        statut_menu = menu.addMenu(f"Statut de {len(ids)} candidat(s)")
+        for statut in ["En attente", "Entretien", "Accepté", "Refusé"]:
+            statut_menu.addAction(statut).triggered.connect(lambda _, v=statut: self.bulk_update(ids, "statut", v))
+        priorite_menu = menu.addMenu(f"Priorité de {len(ids)} candidat(s)")
+        for priorite in ["Basse", "Moyenne", "Haute", "Urgente"]:
+            priorite_menu.addAction(priorite).triggered.connect(lambda _, v=priorite: self.bulk_update(ids, "priorite", v))
+        if self.user_role == "admin":
+            menu.addSeparator()
+            menu.addAction(f"Supprimer {len(ids)} candidat(s)").triggered.connect(lambda: self.delete_candidates(ids))
+        menu.exec_(self.table.viewport().mapToGlobal(pos))
+
+    def bulk_update(self, ids, field, value):
+        # Une seule transaction ; la grille suit par les événements de modification
+        self.executor.submit(
+            self.db.update_candidates, [(candidate_id, field, value) for candidate_id in ids], write=True,
+            on_result=self.report_failures, on_error=lambda e: QMessageBox.warning(self, "Erreur", str(e)),
+        )
+
+    def report_failures(self, failures):
+        if failures:
+            details = "\n".join(f"Candidat {candidate_id} : {message}" for (candidate_id, _), message in list(failures.items())[:10])
+            QMessageBox.warning(self, "Modification", f"{len(failures)} modification(s) refusée(s) :\n{details}")
+
+    def delete_candidates(self, ids):
+        reply = QMessageBox.question(self, "Suppression", f"Supprimer {len(ids)} candidat(s) ?", QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.executor.submit(
+                self.db.delete_candidates, ids, write=True,
+                on_error=lambda e: QMessageBox.warning(self, "Erreur", str(e)),
+            )
+
+    def action_buttons(self, cand):
+        return [
+            ("Supprimer", ("delete", cand[0]), self.user_role == "admin"),
+            ("PDF", ("pdf", cand[0]), True),
+        ]
+
+    def on_action(self, action):
+        name, candidate_id = action
+        if name == "delete":
+            self.delete_candidate(candidate_id)
+        elif name == "pdf":
+            self.export_pdf(candidate_id)
 
     def get_filters(self):
         return {
+            "texte": self.filter_texte.text(),
             "nom_complet": self.filter_nom.text(),
             "poste_demande": self.filter_poste.text(),
             "email": self.filter_email.text(),
@@ -576,79 +1002,39 @@ class ModernCandidatesTable(QWidget):
         }
 
     def apply_filters(self):
+        self.search_timer.stop()
         filters = self.get_filters()
-        self.refresh_table(filters)
+        self.refresh_table(filters, refine=True)
 
     def reset_filters(self):
+        self.filter_texte.clear()
         self.filter_nom.clear()
         self.filter_poste.clear()
         self.filter_email.clear()
         self.filter_statut.setCurrentIndex(0)
         self.filter_priorite.setCurrentIndex(0)
         self.filter_source.setCurrentIndex(0)
+        self.search_timer.stop()
         self.refresh_table()
 
-    def refresh_table(self, filters=None):
-        self._updating = True
-        if filters:
-            candidates = self.db.search_candidates(filters)
-        else:
-            candidates = self.db.get_all_candidates()
-        self.table.setRowCount(len(candidates))
-        for row, cand in enumerate(candidates):
-            for col in range(15):
-                if col < 10:
-                    item = QTableWidgetItem(str(cand[col]) if cand[col] is not None else "")
-                    self.table.setItem(row, col, item)
-                elif col == 10:
-                    w = QLabel()
-                    if cand[11]:
-                        pix = QPixmap(cand[11])
-                        if not pix.isNull():
-                            w.setPixmap(pix.scaled(40, 40, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-                    w.setAlignment(Qt.AlignCenter)
-                    self.table.setCellWidget(row, col, w)
-                elif col == 11:
-                    if cand[9]:
-                        btn = QPushButton("Voir CV")
-                        btn.clicked.connect(lambda _, path=cand[9]: self.open_file(path))
-                        self.table.setCellWidget(row, col, btn)
-                    else:
-                        self.table.setItem(row, col, QTableWidgetItem(""))
-                elif col == 12:
-                    if cand[10]:
-                        files = cand[10].split(";")
-                        w = QWidget()
-                        layout = QHBoxLayout(w)
-                        for f in files:
-                            if f.strip():
-                                btn = QPushButton(os.path.basename(f))
-                                btn.clicked.connect(lambda _, path=f: self.open_file(path))
-                                layout.addWidget(btn)
-                        layout.addStretch()
-                        layout.setContentsMargins(0,0,0,0)
-                        self.table.setCellWidget(row, col, w)
-                    else:
-                        self.table.setItem(row, col, QTableWidgetItem(""))
-                elif col == 13:
-                    item = QTableWidgetItem(str(cand[13]) if len(cand) > 13 else "")
-                    self.table.setItem(row, col, item)
-                elif col == 14:
-                    w = QWidget()
-                    h = QHBoxLayout(w)
-                    btn_delete = QPushButton("Supprimer")
-                    candidate_id = cand[0]
-                    btn_delete.clicked.connect(lambda _, cid=candidate_id: self.delete_candidate(cid))
-                    btn_pdf = QPushButton("PDF")
-                    btn_pdf.clicked.connect(lambda _, cid=candidate_id: self.export_pdf(cid))
-                    if self.user_role != "admin":
-                        btn_delete.setEnabled(False)
-                    h.addWidget(btn_delete)
-                    h.addWidget(btn_pdf)
-                    h.setContentsMargins(0,0,0,0)
-                    w.setLayout(h)
-                    self.table.setCellWidget(row, col, w)
-        self._updating = False
+    def refresh_table(self, filters=None, refine=False):
+        # Les lignes sont chargées par lots à mesure du défilement (fetchMore)
+        self.model.measure = profiler.phases("refresh_table", str(filters or {}))
+        if self.model.load(filters, refine):
+            self.model.end_measure("modele")
+            self.executor.cancel(("count", id(self)))
+            self.count_label.setText(f"{self.model.rowCount()} candidat(s)")
+            return
+        self.model.mark("modele")
+        if self.model.canFetchMore():
+            self.model.fetchMore()
+        self.update_count()
+
+    def update_count(self):
+        self.executor.submit(
+            self.db.count_candidates, self.model.filters, key=("count", id(self)),
+            on_result=lambda n: self.count_label.setText(f"{n} candidat(s)"),
+        )
 
     def open_file(self, path):
         if os.path.exists(path):
@@ -667,94 +1053,195 @@ class ModernCandidatesTable(QWidget):
             return
         reply = QMessageBox.question(self, "Suppression", "Supprimer ce candidat ?", QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.db.delete_candidate(candidate_id)
-            self.refresh_table()
+            self.executor.submit(
+                self.db.delete_candidate, candidate_id, write=True,
+                on_error=lambda e: QMessageBox.warning(self, "Erreur", str(e)),
+            )
 
     def export_pdf(self, candidate_id):
-        cand = self.db.get_candidate_by_id(candidate_id)
-        if not cand:
-            QMessageBox.warning(self, "Erreur", "Candidat introuvable")
-            return
-        path, _ = QFileDialog.getSaveFileName(self, "Exporter en PDF", f"{cand[1]}.pdf", "PDF Files (*.pdf)")
+        row = self.model.find(candidate_id)
+        name = self.model.value(self.model.candidate(row), "nom_complet") if row is not None else "candidat"
+        path, _ = QFileDialog.getSaveFileName(self, "Exporter en PDF", f"{name}.pdf", "PDF Files (*.pdf)")
         if not path:
             return
-        c = canvas.Canvas(path, pagesize=letter)
-        c.setFont("Helvetica", 14)
-        c.drawString(50, 760, f"Fiche Candidat : {cand[1]}")
-        c.setFont("Helvetica", 12)
-        infos = [
-            f"Poste : {cand[2]}",
-            f"Email : {cand[3]}",
-            f"Téléphone : {cand[4]}",
-            f"Date : {cand[5]}",
-            f"Statut : {cand[6]}",
-            f"Priorité : {cand[7]}",
-            f"Source : {cand[12]}",
-            f"Notes : {cand[8]}",
-        ]
-        y = 740
-        for info in infos:
-            c.drawString(50, y, info)
-            y -= 20
-        if cand[11]:
-            try:
-                from reportlab.lib.utils import ImageReader
-                c.drawImage(ImageReader(cand[11]), 400, 700, width=80, height=80)
-            except Exception:
-                pass
-        c.drawString(50, y - 20, "Pièces jointes :")
-        y -= 40
-        if cand[10]:
-            files = cand[10].split(";")
-            for f in files:
-                c.drawString(70, y, os.path.basename(f))
-                y -= 18
-        c.save()
-        QMessageBox.information(self, "Export PDF", "PDF exporté avec succès !")
+        self.executor.submit(
+            pdf_export.export_candidate, self.db, candidate_id, path,
+            on_result=lambda _: QMessageBox.information(self, "Export PDF", "PDF exporté avec succès !"),
+            on_error=lambda e: QMessageBox.warning(self, "Erreur", str(e)),
+        )
+
+    def export_pdf_batch(self):
+        # Fiches de tous les candidats du filtre actif, rendues dans un pool de processus
+        box = QMessageBox(self)
+        box.setWindowTitle("Fiches PDF")
+        box.setText(f"Exporter les fiches de {self.count_label.text() or 'la sélection'} :")
+        per_file = box.addButton("Un PDF par candidat", QMessageBox.AcceptRole)
+        merged = box.addButton("Un seul PDF", QMessageBox.AcceptRole)
+        box.addButton(QMessageBox.Cancel)
+        box.exec_()
+        if box.clickedButton() is per_file:
+            directory = QFileDialog.getExistingDirectory(self, "Dossier des fiches")
+            if not directory:
+                return
+            args = dict(directory=directory)
+        elif box.clickedButton() is merged:
+            path, _ = QFileDialog.getSaveFileName(self, "Fiches PDF", "fiches.pdf", "PDF Files (*.pdf)")
+            if not path:
+                return
+            args = dict(merged_path=path)
+        else:
+            return
+        self.run_job(
+            "Génération des fiches PDF...", "Annuler", self.on_pdf_batch_done,
+            lambda progress: pdf_export.export_sheets(self.db, self.model.filters, progress=progress, **args),
+        )
+
+    def on_pdf_batch_done(self, count):
+        if count is not None:
+            QMessageBox.information(self, "Fiches PDF", f"{count} fiche(s) générée(s).")
+
+    EXPORT_FORMATS = {
+        "Excel (*.xlsx)": ".xlsx",
+        "CSV (*.csv)": ".csv",
+        "Parquet (*.parquet)": ".parquet",
+        "Arrow (*.arrow)": ".arrow",
+    }
 
     def export_to_excel(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Exporter en Excel", "", "Excel Files (*.xlsx)")
+        path, selected = QFileDialog.getSaveFileName(self, "Exporter", "", ";;".join(self.EXPORT_FORMATS))
         if not path:
             return
-        candidates = self.db.get_all_candidates()
-        columns = [
-            "ID", "Nom", "Poste", "Email", "Téléphone",
-            "Date", "Statut", "Priorité", "Notes", "CV", "Pièces jointes", "Photo", "Source", "Date Création"
-        ]
-        df = pd.DataFrame(candidates, columns=[
-            "ID", "Nom", "Poste", "Email", "Téléphone",
-            "Date", "Statut", "Priorité", "Notes", "CV", "Pièces jointes", "Photo", "Source", "Date Création"
-        ])
-        try:
-            df.to_excel(path, index=False)
-            QMessageBox.information(self, "Export", "Exportation réussie !")
-        except Exception as e:
-            QMessageBox.warning(self, "Erreur", f"Erreur export : {e}")
+        if not os.path.splitext(path)[1]:
+            path += self.EXPORT_FORMATS.get(selected, ".xlsx")
+        # Exporte la sélection affichée (filtres actifs du tableau)
+        self.run_job(
+            "Exportation en cours...", "Annuler", self.on_export_done,
+            export_engine.export_candidates, self.db, path, self.model.filters,
+        )
+
+    def on_export_done(self, count):
+        if count is not None:
+            QMessageBox.information(self, "Export", f"Exportation réussie : {count} candidat(s).")
+
+    def run_job(self, label, cancel_text, on_done, fn, *args, write=False):
+        # Tâche longue (import/export) exécutée dans le pool, avec une barre de
+        # progression ; le bouton d'annulation demande un arrêt au prochain lot.
+        dialog = QProgressDialog(label, cancel_text, 0, 0, self)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(300)
+
+        def on_progress(done, total):
+            if total:
+                dialog.setMaximum(total)
+                dialog.setValue(min(done, total))
+            dialog.setLabelText(f"{label}\n{done} ligne(s) traitée(s)")
+
+        def on_result(result):
+            dialog.close()
+            on_done(result)
+
+        def on_error(error):
+            dialog.close()
+            if isinstance(error, ValueError):
+                QMessageBox.warning(self, "Erreur", str(error))
+            else:
+                QMessageBox.warning(self, "Erreur", f"Erreur : {error}")
+
+        task = self.executor.submit(
+            fn, *args, write=write, on_result=on_result, on_error=on_error, on_progress=on_progress,
+        )
+        dialog.canceled.connect(task.request_stop)
+        return task
 
     def import_from_excel(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Importer fichier Excel", "", "Excel Files (*.xlsx)")
+        path, _ = QFileDialog.getOpenFileName(self, "Importer un fichier", "", "Excel / CSV (*.xlsx *.csv)")
         if not path:
             return
-        try:
-            df = pd.read_excel(path)
-            required_cols = {"Nom", "Poste", "Email", "Téléphone", "Date", "Statut", "Priorité", "Notes"}
-            if not required_cols.issubset(set(df.columns)):
-                QMessageBox.warning(self, "Erreur", "Colonnes obligatoires manquantes dans le fichier Excel.")
-                return
-            for _, row in df.iterrows():
-                data = (
-                    row.get("Nom", ""), row.get("Poste", ""), row.get("Email", ""), row.get("Téléphone", ""),
-                    str(row.get("Date", ""))[:10], row.get("Statut", ""), row.get("Priorité", ""), row.get("Notes", ""),
-                    None, None, None, row.get("Source", "")
-                )
-                try:
-                    self.db.add_candidate(data)
-                except Exception:
-                    continue
-            QMessageBox.information(self, "Import", "Importation terminée !")
-            self.refresh_table()
-        except Exception as e:
-            QMessageBox.warning(self, "Erreur", f"Erreur import : {e}")
+        self.run_job(
+            "Importation en cours...", "Interrompre", self.on_import_done,
+            import_pipeline.import_file, self.db, path, write=True,
+        )
+
+    def on_import_done(self, report):
+        message = (
+            f"{report['inserted']} ajouté(s), {report['skipped']} doublon(s) ignoré(s), "
+            f"{report['invalid']} ligne(s) invalide(s)."
+        )
+        if report["resumed_from"]:
+            message = f"Reprise à la ligne {report['resumed_from'] + 2}. " + message
+        if report["completed"]:
+            message = "Importation terminée : " + message
+        else:
+            message = (
+                f"Import interrompu après {report['rows_done']} ligne(s) : " + message
+                + "\nRelancez l'import du même fichier pour reprendre."
+            )
+        details = "\n".join(f"Ligne {line} : {reason}" for line, reason in report["errors"][:20])
+        if details:
+            message += "\n\n" + details
+        QMessageBox.information(self, "Import", message)
+
+class PerformancePanel(QDialog):
+    # Latences par opération (profiling), relues chaque seconde
+    HEADERS = ["Opération", "Appels", "p50 (ms)", "p95 (ms)", "Max (ms)"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Performances")
+        self.resize(640, 480)
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+        self.log_label = QLabel(f"Opérations de plus de {profiler.threshold_ms:g} ms : {os.path.abspath(profiler.log_path)}")
+        self.log_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.log_label)
+        buttons = QHBoxLayout()
+        reset_btn = QPushButton("Réinitialiser")
+        reset_btn.clicked.connect(self.reset)
+        buttons.addWidget(reset_btn)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        rows = profiler.summary()
+        self.table.setRowCount(len(rows))
+        for i, (name, count, p50, p95, worst) in enumerate(rows):
+            self.table.setItem(i, 0, QTableWidgetItem(name))
+            for col, value in enumerate((count, p50, p95, worst), 1):
+                item = QTableWidgetItem(f"{value:.1f}" if isinstance(value, float) else str(value))
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(i, col, item)
+
+    def reset(self):
+        profiler.reset()
+        self.refresh()
+
+class LazyTab(QWidget):
+    # Onglet construit à sa première apparition : factory() fournit le widget
+    def __init__(self, factory, parent=None):
+        super().__init__(parent)
+        self.factory = factory
+        self.widget = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+    def build(self):
+        if self.widget is None:
+            self.widget = self.factory()
+            self.layout().addWidget(self.widget)
+        return self.widget
+
+    def showEvent(self, event):
+        self.build()
+        super().showEvent(event)
 
 class MainWindow(QMainWindow):
     def __init__(self, user_role="user", username='', db=None):
@@ -764,19 +1251,29 @@ class MainWindow(QMainWindow):
         self.db = db if db else DatabaseManager()
         self.setWindowTitle("Gestionnaire de Candidatures Moderne")
         self.setGeometry(100, 100, 1450, 800)
+        self.executor = QueryExecutor(self.db, self)
         self.tab = QTabWidget()
         self.dashboard = DashboardWidget(self.db)
-        self.candidates_table = ModernCandidatesTable(self.db, user_role=self.user_role)
-        self.candidate_form = ModernCandidateForm(self.db, self.dashboard, self.candidates_table)
+        # Formulaire et tableau construits à la première ouverture de leur onglet
+        self.table_tab = LazyTab(
+            lambda: ModernCandidatesTable(self.db, user_role=self.user_role, executor=self.executor)
+        )
+        self.form_tab = LazyTab(
+            lambda: ModernCandidateForm(self.db, self.dashboard, self.table_tab.widget, executor=self.executor)
+        )
         self.tab.addTab(self.dashboard, "Dashboard")
-        self.tab.addTab(self.candidate_form, "Ajouter Candidat")
-        self.tab.addTab(self.candidates_table, "Candidatures")
+        self.tab.addTab(self.form_tab, "Ajouter Candidat")
+        self.tab.addTab(self.table_tab, "Candidatures")
         self.setCentralWidget(self.tab)
         self.status = self.statusBar()
         self.update_status()
+        # Les écritures des autres postes (et les nôtres) sont détectées chaque
+        # seconde ; les statistiques ne sont relues que s'il y en a eu
+        self.watcher = self.db.watcher()
+        self._polling = False
         self.timer = QTimer()
-        self.timer.timeout.connect(self.update_status)
-        self.timer.start(10000)
+        self.timer.timeout.connect(self.poll_changes)
+        self.timer.start(1000)
 
         self.dark_mode = False
         self.mode_btn = QPushButton("Mode sombre")
@@ -795,14 +1292,65 @@ class MainWindow(QMainWindow):
             self.action_add_user = QAction("Ajouter utilisateur", self)
             self.action_add_user.triggered.connect(self.show_add_user_dialog)
             self.menu_admin.addAction(self.action_add_user)
+            self.action_gc_files = QAction("Nettoyer les fichiers orphelins", self)
+            self.action_gc_files.triggered.connect(self.collect_orphan_files)
+            self.menu_admin.addAction(self.action_gc_files)
+
+        # Mesures actives (CANDIDATURE_PROFIL) : panneau des latences
+        if profiler.enabled:
+            self.menu_tools = self.menuBar().addMenu("Outils")
+            self.action_performance = QAction("Performances", self)
+            self.action_performance.triggered.connect(self.show_performance_panel)
+            self.menu_tools.addAction(self.action_performance)
+            self.performance_panel = None
+
+    def show_performance_panel(self):
+        if self.performance_panel is None:
+            self.performance_panel = PerformancePanel(self)
+        self.performance_panel.show()
+        self.performance_panel.raise_()
+
+    def poll_changes(self):
+        # Lu dans le pool : une base ou un service lent ne fige pas la fenêtre.
+        # Pas de nouvelle lecture tant que la précédente n'est pas revenue.
+        if self._polling:
+            return
+        self._polling = True
+        self.executor.submit(self.watcher.poll, on_result=self._changes_polled,
+                             on_error=lambda e: self._changes_polled([]))
+
+    def _changes_polled(self, changes):
+        self._polling = False
+        if changes:
+            self.update_status()
+            self.dashboard.refresh_stats()
 
     def update_status(self):
-        stats = self.db.get_stats()
+        self.executor.submit(self.db.get_stats, key="status", on_result=self.show_status)
+
+    def show_status(self, stats):
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.status.showMessage(
             f"Connecté: {self.username} | Rôle: {self.user_role} | Candidats: {stats['total']} | Acceptés: {stats['accepte']} | En attente: {stats['en_attente']} | {now}"
         )
 
+    def collect_orphan_files(self):
+        stores = [FileStore(ATTACH_DIR, self.db), FileStore(PHOTO_DIR, self.db)]
+        self.executor.submit(
+            lambda: sum(store.collect_garbage() for store in stores),
+            on_result=lambda n: QMessageBox.information(self, "Nettoyage", f"{n} fichier(s) orphelin(s) supprimé(s)."),
+            on_error=lambda e: QMessageBox.warning(self, "Erreur", str(e)),
+        )
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        if self.table_tab.widget is not None:
+            self.table_tab.widget.model.write_queue.flush()
+        # Lecture des changements éventuellement en cours terminée avant la fermeture
+        self.executor.shutdown()
+        self.watcher.close()
+        super().closeEvent(event)
+
     def toggle_theme(self):
         self.dark_mode = not self.dark_mode
         app = QApplication.instance()
@@ -872,35 +1420,50 @@ class MainWindow(QMainWindow):
             if new_pw != conf_pw:
                 QMessageBox.warning(dialog, "Erreur", "La confirmation ne correspond pas.")
                 return
-            # Vérifier l'ancien mot de passe
-            pw_hash = hashlib.sha256(old_pw.encode()).hexdigest()
-            with self.db.connect() as conn:
-                c = conn.cursor()
-                c.execute("SELECT id FROM users WHERE username=? AND password=?", (self.username, pw_hash))
-                row = c.fetchone()
-                if not row:
-                    QMessageBox.warning(dialog, "Erreur", "L'ancien mot de passe est incorrect.")
-                    return
-                # Mettre à jour le mot de passe
-                new_pw_hash = hashlib.sha256(new_pw.encode()).hexdigest()
-                c.execute("UPDATE users SET password=? WHERE username=?", (new_pw_hash, self.username))
-                conn.commit()
-                QMessageBox.information(dialog, "Succès", "Mot de passe modifié avec succès.")
-                dialog.accept()
+            # Vérifie l'ancien mot de passe et le remplace
+            if not self.db.change_password(self.username, old_pw, new_pw):
+                QMessageBox.warning(dialog, "Erreur", "L'ancien mot de passe est incorrect.")
+                return
+            QMessageBox.information(dialog, "Succès", "Mot de passe modifié avec succès.")
+            dialog.accept()
         buttons.accepted.connect(change_pw)
         buttons.rejected.connect(dialog.reject)
         dialog.exec_()
 
 def main():
+    # Durées du démarrage, saisie des identifiants exclue ; rapport sur la
+    # sortie d'erreur avec CANDIDATURE_DEMARRAGE=1
+    startup = Phases(profiler, "demarrage", start=STARTED)
+    startup.phase("imports")
     app = QApplication(sys.argv)
-    db = DatabaseManager()
+    startup.phase("qt")
+    # Poste relié au service partagé (candidature_server.py) ou au fichier local
+    server = os.environ.get(ENV_SERVER)
+    db = RemoteDatabase(server) if server else DatabaseManager()
+    if profiler.enable_from_env():
+        profiler.instrument(db)
+    startup.phase("base")
     login = LoginDialog(db)
+    startup.phase("connexion")
     if login.exec_() == QDialog.Accepted:
+        startup.skip()
         window = MainWindow(user_role=login.role, username=login.username, db=db)
+        startup.phase("fenetre")
         window.show()
-        sys.exit(app.exec_())
+        QTimer.singleShot(0, lambda: report_startup(startup))
+        code = app.exec_()
+        db.close()
+        sys.exit(code)
     else:
+        db.close()
         sys.exit(0)
 
+def report_startup(startup):
+    # Premier passage dans la boucle d'événements : fenêtre affichée
+    startup.phase("affichage")
+    total = startup.finish()
+    if os.environ.get("CANDIDATURE_DEMARRAGE"):
+        print(f"Démarrage : {total:.0f} ms ({startup.describe()})", file=sys.stderr)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,372 @@
+import argparse
+import asyncio
+import json
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from candidature_core import DB_NAME, DatabaseManager
+from profiling import profiler
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+READERS = 4
+# Écritures reprises dans une même transaction
+MAX_BATCH = 200
+MAX_BODY = 256 * 1024 * 1024
+
+# Projections autorisées (les clients désignent une liste par son nom, jamais par du SQL)
+FIELD_SETS = {
+    "list": DatabaseManager.LIST_FIELDS,
+    "export": DatabaseManager.EXPORT_FIELDS,
+    "sheet": DatabaseManager.SHEET_FIELDS,
+}
+# Lectures exposées, et celles dont le résultat est gardé en cache
+READ_OPERATIONS = {
+    "list_candidates_page", "list_candidates_by_ids", "count_candidates",
+    "search_candidates", "search_text", "get_candidate_by_id", "get_candidate_files", "list_files_by_candidates",
+    "get_stats", "get_breakdown", "get_file_stats", "orphan_files", "get_changes",
+}
+CACHED_OPERATIONS = {
+    "list_candidates_page", "list_candidates_by_ids", "count_candidates", "search_candidates", "search_text",
+    "get_candidate_by_id", "get_candidate_files", "list_files_by_candidates", "get_stats", "get_breakdown",
+    "get_file_stats",
+}
+# Écritures exposées ; les ajouts et modifications consécutifs partagent une transaction.
+# get_import_checkpoint en fait partie : il efface le point de reprise d'un fichier modifié.
+WRITE_OPERATIONS = {
+    "add_candidate", "update_candidates", "delete_candidates", "delete_candidate", "bulk_add_candidates",
+    "get_import_checkpoint", "clear_import_checkpoint", "register_file", "forget_file", "add_user",
+    "change_password",
+}
+# Réservées au rôle admin, comme dans l'application (vérifié ici, pas seulement par le client)
+ADMIN_OPERATIONS = {"add_user", "delete_candidates", "delete_candidate", "forget_file"}
+# Session abandonnée après ce délai sans appel (s)
+SESSION_IDLE = 12 * 3600
+# Attente après un échec de connexion, contre l'essai de mots de passe en rafale (s)
+LOGIN_DELAY = 1
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def to_json(value):
+    # Types numpy (index des DataFrame d'import) convertis en types Python
+    return json.dumps(value, ensure_ascii=False, default=lambda o: o.item() if hasattr(o, "item") else str(o)).encode()
+
+
+class ResultCache:
+    # Réponses des lectures (JSON déjà encodé), vidées à chaque écriture. Une
+    # lecture commencée avant une écriture n'est pas gardée : generation
+    # change à chaque invalidation.
+    def __init__(self, size=1024):
+        self.size = size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = body
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *_):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+class CandidatureService:
+    # Accès partagé à une base : les lectures passent par un pool de threads
+    # (une connexion SQLite chacun), les écritures par une file unique vidée par
+    # lots dans le thread d'écriture. Les écritures faites directement sur le
+    # fichier (ligne de commande, postes non migrés) sont vues par ChangeWatcher
+    # et vident aussi le cache. Chaque appel porte le jeton de session donné par
+    # authenticate ; suppressions et gestion des utilisateurs exigent le rôle admin.
+    def __init__(self, db, readers=READERS):
+        self.db = db
+        self.readers = ThreadPoolExecutor(readers, thread_name_prefix="lecture")
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix="ecriture")
+        self.cache = ResultCache()
+        db.add_listener(self.cache.invalidate)
+        self.watcher = db.watcher()
+        self.writes = None
+        self.server = None
+        self.clients = {}
+        self._polling = None
+        # Jeton -> [utilisateur, rôle, dernier appel]
+        self.sessions = {}
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.writes = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self.write_loop())
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def close(self):
+        # Connexions persistantes fermées : leurs lectures en attente se terminent
+        self.server.close()
+        for writer in list(self.clients.values()):
+            writer.close()
+        await asyncio.gather(*self.clients, return_exceptions=True)
+        await self.server.wait_closed()
+        self.writer_task.cancel()
+        self.readers.shutdown()
+        self.writer.shutdown()
+        self.watcher.close()
+
+    # --- HTTP ---
+
+    async def handle(self, reader, writer):
+        # HTTP/1.1 minimal, connexions persistantes : POST /api/<opération> avec
+        # les paramètres nommés en JSON, réponse {"result": ...} ou {"error": ...}
+        self.clients[asyncio.current_task()] = writer
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+                method, target, _ = request.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {"error": "Requête trop volumineuse"})
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.dispatch(method, urlsplit(target).path, body, headers.get("authorization"))
+                await self.respond(writer, status, payload)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            del self.clients[asyncio.current_task()]
+            writer.close()
+
+    async def respond(self, writer, status, payload):
+        body = payload if isinstance(payload, bytes) else to_json(payload)
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+    async def dispatch(self, method, path, body, authorization=None):
+        # authenticate ouvre une session ; tout autre appel porte son jeton
+        # (Authorization: Bearer <jeton>)
+        if path == "/health":
+            return 200, {"result": {"cache": {"hits": self.cache.hits, "misses": self.cache.misses}}}
+        if not path.startswith("/api/"):
+            return 404, {"error": f"Inconnu : {path}"}
+        operation = path[len("/api/"):]
+        if operation not in READ_OPERATIONS and operation not in WRITE_OPERATIONS | {"authenticate", "logout"}:
+            return 404, {"error": f"Opération inconnue : {operation}"}
+        if method != "POST":
+            return 405, {"error": "POST attendu"}
+        try:
+            params = json.loads(body or b"{}")
+            if operation == "authenticate":
+                return 200, {"result": await self.login(params["username"], params["password"])}
+            token = (authorization or "").removeprefix("Bearer ").strip()
+            session = self.session(token)
+            if session is None:
+                return 401, {"error": "Session expirée ou invalide : reconnectez-vous."}
+            if operation == "logout":
+                del self.sessions[token]
+                return 200, {"result": None}
+            if operation in ADMIN_OPERATIONS and session[1] != "admin":
+                return 403, {"error": "Opération réservée aux administrateurs."}
+            if operation == "change_password":
+                # Uniquement le mot de passe de l'utilisateur connecté
+                params["username"] = session[0]
+            if operation in READ_OPERATIONS:
+                return 200, await self.read(operation, params)
+            return 200, {"result": await self.write(operation, params)}
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    # --- Sessions ---
+
+    async def login(self, username, password):
+        # {"role", "token"} ou None si les identifiants sont refusés
+        role = await self.run(self.readers, self.db.authenticate, username, password)
+        if not role:
+            await asyncio.sleep(LOGIN_DELAY)
+            return None
+        token = secrets.token_urlsafe(32)
+        self.sessions[token] = [username, role, time.monotonic()]
+        return {"role": role, "token": token}
+
+    def session(self, token):
+        session = self.sessions.get(token) if token else None
+        if session is None:
+            return None
+        now = time.monotonic()
+        if now - session[2] > SESSION_IDLE:
+            del self.sessions[token]
+            return None
+        session[2] = now
+        return session
+
+    # --- Lectures ---
+
+    async def read(self, operation, params):
+        if operation not in CACHED_OPERATIONS:
+            result = await self.run(self.readers, self.call, operation, params)
+            return to_json({"result": result})
+        await self.check_external_writes()
+        key = (operation, json.dumps(params, sort_keys=True))
+        body = self.cache.get(key)
+        if body is None:
+            generation = self.cache.generation
+            body = to_json({"result": await self.run(self.readers, self.call, operation, params)})
+            self.cache.put(key, body, generation)
+        return body
+
+    async def check_external_writes(self):
+        # Écritures d'autres accès à la base (ligne de commande, postes non
+        # migrés) : ChangeWatcher lu dans le pool de lecture, jamais dans la
+        # boucle, le journal pouvant être long après un import. Un seul passage
+        # à la fois, partagé par les lectures arrivées entre-temps.
+        polling = self._polling
+        if polling is not None:
+            await polling
+            return
+        polling = self._polling = asyncio.get_running_loop().run_in_executor(self.readers, self.watcher.poll)
+        try:
+            await polling
+        finally:
+            self._polling = None
+
+    def call(self, operation, params):
+        params = dict(params)
+        if "fields" in params:
+            params["fields"] = FIELD_SETS[params["fields"]] if params["fields"] else None
+        return getattr(self.db, operation)(**params)
+
+    @staticmethod
+    async def run(executor, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    # --- Écritures ---
+
+    async def write(self, operation, params):
+        future = asyncio.get_running_loop().create_future()
+        await self.writes.put((operation, params, future))
+        return await future
+
+    async def write_loop(self):
+        # Les écritures arrivées pendant le traitement d'un lot partent ensemble au suivant
+        while True:
+            batch = [await self.writes.get()]
+            while len(batch) < MAX_BATCH and not self.writes.empty():
+                batch.append(self.writes.get_nowait())
+            outcomes = await self.run(self.writer, self.apply_writes, [(op, params) for op, params, _ in batch])
+            for (_, _, future), (ok, value) in zip(batch, outcomes):
+                if future.cancelled():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def apply_writes(self, batch):
+        # [(opération, paramètres)] -> [(succès, résultat ou exception)], dans l'ordre.
+        # Ajouts et modifications consécutifs : une transaction par groupe.
+        outcomes = []
+        start = 0
+        while start < len(batch):
+            operation = batch[start][0]
+            end = start + 1
+            if operation in ("add_candidate", "update_candidates"):
+                while end < len(batch) and batch[end][0] == operation:
+                    end += 1
+            group = [params for _, params in batch[start:end]]
+            try:
+                if operation == "add_candidate":
+                    results = self.db.add_candidates([params["data"] for params in group])
+                    outcomes += [(False, Exception(r)) if isinstance(r, str) else (True, r) for r in results]
+                elif operation == "update_candidates":
+                    failures = self.db.update_candidates([change for params in group for change in params["changes"]])
+                    for params in group:
+                        keys = {(change[0], change[1]) for change in params["changes"]}
+                        outcomes.append((True, [[i, field, message] for (i, field), message in failures.items()
+                                                if (i, field) in keys]))
+                else:
+                    outcomes.append((True, self.write_one(operation, group[0])))
+            except Exception as e:
+                outcomes += [(False, e)] * (end - start)
+            start = end
+        return outcomes
+
+    def write_one(self, operation, params):
+        if operation == "bulk_add_candidates":
+            import pandas as pd
+            frame = params["frame"]
+            df = pd.DataFrame(frame["data"], index=frame["index"], columns=frame["columns"])
+            checkpoint = tuple(params["checkpoint"]) if params.get("checkpoint") else None
+            return self.db.bulk_add_candidates(df, checkpoint=checkpoint)
+        return getattr(self.db, operation)(**params)
+
+
+async def serve(db, host, port, readers):
+    service = CandidatureService(db, readers)
+    server = await service.start(host, port)
+    print(f"Service des candidatures sur http://{host}:{port} ({db.path})", file=sys.stderr)
+    try:
+        await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service local d'accès partagé à la base des candidatures.")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument(
+        "--host", default=DEFAULT_HOST,
+        help="adresse d'écoute (défaut : ce poste uniquement ; 0.0.0.0 pour les autres postes, "
+             "sur un réseau de confiance : HTTP non chiffré)",
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--lecteurs", type=int, default=READERS, help="connexions de lecture")
+    args = parser.parse_args(argv)
+    db = DatabaseManager(args.db)
+    if profiler.enable_from_env():
+        profiler.instrument(db)
+    try:
+        asyncio.run(serve(db, args.host, args.port, args.lecteurs))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
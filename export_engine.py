@@ -0,0 +1,116 @@
+import csv
+import os
+
+from profiling import profiler
+
+CHUNK_SIZE = 5000
+
+# En-tête de chaque champ de DatabaseManager.EXPORT_FIELDS (relisibles par import_pipeline)
+HEADERS = {
+    "id": "ID", "nom_complet": "Nom", "poste_demande": "Poste", "email": "Email",
+    "telephone": "Téléphone", "date_candidature": "Date", "statut": "Statut", "priorite": "Priorité",
+    "source": "Source", "notes": "Notes", "nb_pieces": "Nb pièces jointes", "date_creation": "Date Création",
+}
+INTEGER_COLUMNS = {"ID", "Nb pièces jointes"}
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        # utf-8-sig : accents lisibles à l'ouverture dans Excel
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxWriter:
+    def __init__(self, path, columns):
+        from openpyxl import Workbook
+        self.path = path
+        # write_only : les lignes partent sur disque au fil de l'eau
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("Candidats")
+        self.sheet.append(columns)
+
+    def write(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+class ArrowWriter:
+    # Parquet (format="parquet") ou fichier Arrow IPC (format="arrow"), un groupe de lignes par lot
+    def __init__(self, path, columns, format="parquet"):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ValueError("L'export Parquet/Arrow nécessite le paquet pyarrow.")
+        self.pa = pa
+        self.columns = columns
+        self.schema = pa.schema([(name, pa.int64() if name in INTEGER_COLUMNS else pa.string()) for name in columns])
+        if format == "parquet":
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(path, self.schema)
+        else:
+            import pyarrow.ipc as ipc
+            self.writer = ipc.new_file(path, self.schema)
+
+    def write(self, rows):
+        arrays = [
+            self.pa.array([row[i] if row[i] is None or field.name in INTEGER_COLUMNS else str(row[i]) for row in rows],
+                          type=field.type)
+            for i, field in enumerate(self.schema)
+        ]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {
+    "csv": CsvWriter,
+    "xlsx": XlsxWriter,
+    "parquet": lambda path, columns: ArrowWriter(path, columns, "parquet"),
+    "arrow": lambda path, columns: ArrowWriter(path, columns, "arrow"),
+}
+
+
+@profiler.operation("tache.export", rows=lambda count: count)
+def export_candidates(db, path, filters=None, fmt=None, chunk_size=CHUNK_SIZE, progress=None):
+    # Parcourt les candidats filtrés par pages (curseur) et les écrit au fil de l'eau :
+    # la mémoire reste constante quel que soit le volume.
+    # progress(lignes écrites, total) ; s'il renvoie False l'export est annulé et le fichier supprimé.
+    # Renvoie le nombre de lignes exportées, ou None si annulé.
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Format d'export non pris en charge : {fmt}")
+    total = db.count_candidates(filters)
+    writer = WRITERS[fmt](path, [HEADERS[name] for name, _ in db.EXPORT_FIELDS])
+    done = 0
+    cursor = None
+    try:
+        while True:
+            rows, cursor = db.list_candidates_page(filters, cursor, chunk_size, db.EXPORT_FIELDS)
+            if rows:
+                writer.write(rows)
+                done += len(rows)
+            if progress and progress(done, total) is False:
+                writer.close()
+                os.remove(path)
+                return None
+            if cursor is None:
+                break
+    except Exception:
+        writer.close()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    writer.close()
+    return done
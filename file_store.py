@@ -0,0 +1,119 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+CHUNK_SIZE = 1 << 20
+# ioctl Linux de clonage de fichier (reflink : btrfs, xfs...)
+FICLONE = 0x40049409
+
+
+class FileStore:
+    # Stockage adressé par contenu : <racine>/<ab>/<cd>/<sha256>/<nom d'origine>.
+    # Deux fichiers identiques ne sont stockés qu'une fois, deux fichiers différents
+    # de même nom ne se remplacent plus. Chaque fichier est indexé dans
+    # stored_files avec un compteur de références tenu par la base.
+    def __init__(self, root, db, hardlink=False, base=None):
+        # hardlink : partage l'inode de l'original (même système de fichiers) ; à
+        # réserver aux sources qui ne seront pas modifiées sur place.
+        # base : dossier de l'application, d'où partent les chemins enregistrés
+        # (répertoire courant par défaut) ; root est alors relatif à base.
+        self.base = base
+        self.root = os.path.join(base, root) if base else root
+        self.db = db
+        self.hardlink = hardlink
+        os.makedirs(self.root, exist_ok=True)
+
+    def location(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    @staticmethod
+    def hash_file(path, progress=None, total=None):
+        digest = hashlib.sha256()
+        done = 0
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(block)
+                done += len(block)
+                if progress:
+                    progress(done, total)
+        return digest.hexdigest()
+
+    def put(self, src, progress=None):
+        # Range src dans le stockage et renvoie son chemin (relatif à base).
+        # progress(octets, total) couvre le calcul d'empreinte puis la copie.
+        size = os.path.getsize(src)
+        total = 2 * size
+        digest = self.hash_file(src, progress, total)
+        folder = self.location(digest)
+        existing = [name for name in os.listdir(folder) if not name.endswith(".part")] if os.path.isdir(folder) else []
+        if existing:
+            dest = os.path.join(folder, existing[0])
+        else:
+            os.makedirs(folder, exist_ok=True)
+            dest = os.path.join(folder, os.path.basename(src))
+            fd, tmp = tempfile.mkstemp(suffix=".part", dir=folder)
+            os.close(fd)
+            os.remove(tmp)
+            if not self._link(src, tmp):
+                self._copy(src, tmp, progress, size, total)
+            os.replace(tmp, dest)
+        # Chemin enregistré (et renvoyé) relatif à base, comme ceux des candidats
+        stored = os.path.relpath(dest, self.base) if self.base else dest
+        self.db.register_file(stored, digest, size)
+        if progress:
+            progress(total, total)
+        return stored
+
+    def _link(self, src, dest):
+        if self.hardlink:
+            try:
+                os.link(src, dest)
+                return True
+            except OSError:
+                pass
+        try:
+            import fcntl
+        except ImportError:
+            return False
+        try:
+            with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src, dest)
+            return True
+        except OSError:
+            # Pas de reflink ici (autre système de fichiers, non supporté) : copie classique
+            if os.path.exists(dest):
+                os.remove(dest)
+            return False
+
+    @staticmethod
+    def _copy(src, dest, progress, done, total):
+        with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+            for block in iter(lambda: fsrc.read(CHUNK_SIZE), b""):
+                fdst.write(block)
+                done += len(block)
+                if progress:
+                    progress(done, total)
+        shutil.copystat(src, dest)
+
+    def collect_garbage(self, grace_seconds=3600):
+        # Supprime les fichiers de ce stockage qui ne sont plus référencés par aucun
+        # candidat (ou jamais enregistrés) depuis plus de grace_seconds.
+        removed = 0
+        root = os.path.abspath(self.root)
+        for stored in self.db.orphan_files(grace_seconds):
+            path = os.path.join(self.base, stored) if self.base else stored
+            if not os.path.abspath(path).startswith(root + os.sep):
+                continue
+            # L'entrée d'index disparaît d'abord, seulement si toujours orpheline
+            if not self.db.forget_file(stored):
+                continue
+            if os.path.exists(path):
+                os.remove(path)
+            folder = os.path.dirname(path)
+            while os.path.abspath(folder) != root and os.path.isdir(folder) and not os.listdir(folder):
+                os.rmdir(folder)
+                folder = os.path.dirname(folder)
+            removed += 1
+        return removed
@@ -0,0 +1,93 @@
+import os
+
+from profiling import profiler
+
+BATCH_SIZE = 2000
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return f"{st.st_size}:{int(st.st_mtime)}"
+
+
+def count_rows(path):
+    # Estimation rapide du nombre de lignes de données (sans l'en-tête)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, "rb") as f:
+            lines = sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b""))
+        return max(lines - 1, 0)
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True)
+    try:
+        max_row = wb.active.max_row
+    finally:
+        wb.close()
+    return max(max_row - 1, 0) if max_row else None
+
+
+def iter_batches(path, batch_size=BATCH_SIZE, skip=0):
+    # DataFrames successifs dont l'index est le numéro de ligne de données (0 = 1re ligne après l'en-tête)
+    import pandas as pd
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        # Les lignes vides sont lues (puis écartées) pour que l'index suive les lignes
+        # du fichier, comme pour une feuille ; skiprows en fonction plutôt qu'en liste,
+        # que pandas convertirait en un ensemble de skip entiers à la reprise.
+        reader = pd.read_csv(path, chunksize=batch_size, dtype=str, encoding="utf-8-sig",
+                             skip_blank_lines=False, skiprows=lambda i: 0 < i <= skip)
+        for chunk in reader:
+            chunk.index += skip
+            chunk = chunk.dropna(how="all")
+            if len(chunk):
+                yield chunk
+        return
+    if ext != ".xlsx":
+        raise ValueError(f"Format non pris en charge : {ext}")
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+        # Les lignes vides sont ignorées mais gardent leur numéro : l'index suit la feuille
+        batch, index = [], []
+        for i, values in enumerate(rows):
+            if i < skip or all(v is None for v in values):
+                continue
+            batch.append(values[:len(header)])
+            index.append(i)
+            if len(batch) == batch_size:
+                yield pd.DataFrame(batch, columns=header, index=index)
+                batch, index = [], []
+        if batch:
+            yield pd.DataFrame(batch, columns=header, index=index)
+    finally:
+        wb.close()
+
+
+@profiler.operation("tache.import")
+def import_file(db, path, batch_size=BATCH_SIZE, progress=None):
+    # Import en flux par lots de batch_size lignes, chaque lot validé et committé
+    # avec son point de reprise. Un import interrompu reprend au dernier lot committé.
+    # progress(lignes traitées, total ou None) ; s'il renvoie False l'import s'arrête.
+    source = os.path.abspath(path)
+    signature = file_signature(path)
+    state = db.get_import_checkpoint(source, signature) or dict(rows_done=0, inserted=0, skipped=0, invalid=0)
+    report = dict(state, resumed_from=state["rows_done"], errors=[], completed=False)
+    total = count_rows(path)
+    if progress:
+        progress(report["rows_done"], total)
+    for batch in iter_batches(path, batch_size, skip=report["rows_done"]):
+        rows_done = int(batch.index[-1]) + 1
+        result = db.bulk_add_candidates(batch, checkpoint=(source, signature, rows_done))
+        report["rows_done"] = rows_done
+        report["inserted"] += len(result["inserted"])
+        report["skipped"] += len(result["skipped"])
+        report["invalid"] += len(result["invalid"])
+        # Numéro de ligne du fichier = ligne de données + 2 (en-tête sur la ligne 1)
+        report["errors"].extend((label + 2, reason) for label, reason in result["invalid"])
+        if progress and progress(rows_done, total) is False:
+            return report
+    db.clear_import_checkpoint(source)
+    report["completed"] = True
+    return report
@@ -0,0 +1,210 @@
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+from profiling import profiler
+
+# Fiches envoyées à chaque processus de rendu
+CHUNK_SIZE = 50
+# Côté en pixels des photos de fiche (dessinées en 80 x 80 pt)
+PHOTO_PIXELS = 160
+
+
+@lru_cache(maxsize=256)
+def image_reader(path):
+    # Photo réduite avant d'être confiée à reportlab, qui garde le bitmap décodé :
+    # chaque entrée du cache reste petite quelle que soit la taille de l'original.
+    # Décodée une seule fois par processus (photos partagées par le stockage dédoublonné).
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+    with Image.open(path) as image:
+        image.draft("RGB", (PHOTO_PIXELS, PHOTO_PIXELS))
+        image.thumbnail((PHOTO_PIXELS, PHOTO_PIXELS))
+        small = image.convert("RGB")
+    return ImageReader(small)
+
+
+def render_candidate_sheet(c, cand):
+    # Dessine la fiche de cand (dict, champs de DatabaseManager.SHEET_FIELDS et
+    # "pieces_jointes") sur la page courante du canvas c
+    c.setFont("Helvetica", 14)
+    c.drawString(50, 760, f"Fiche Candidat : {cand['nom_complet']}")
+    c.setFont("Helvetica", 12)
+    infos = [
+        f"Poste : {cand['poste_demande']}",
+        f"Email : {cand['email']}",
+        f"Téléphone : {cand['telephone']}",
+        f"Date : {cand['date_candidature']}",
+        f"Statut : {cand['statut']}",
+        f"Priorité : {cand['priorite']}",
+        f"Source : {cand['source']}",
+        f"Notes : {cand['notes']}",
+    ]
+    y = 740
+    for info in infos:
+        c.drawString(50, y, info)
+        y -= 20
+    if cand["photo_path"]:
+        try:
+            c.drawImage(image_reader(cand["photo_path"]), 400, 700, width=80, height=80)
+        except Exception:
+            pass
+    c.drawString(50, y - 20, "Pièces jointes :")
+    y -= 40
+    for f in cand["pieces_jointes"]:
+        c.drawString(70, y, os.path.basename(f))
+        y -= 18
+
+
+def write_sheets(path, cands):
+    # Un PDF, une page par candidat
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(path, pagesize=letter)
+    for cand in cands:
+        render_candidate_sheet(c, cand)
+        c.showPage()
+    c.save()
+    return len(cands)
+
+
+def sheet_filename(cand):
+    name = re.sub(r"[^\w\-]+", "_", cand["nom_complet"]).strip("_") or "candidat"
+    return f"{cand['id']}_{name}.pdf"
+
+
+def write_sheet_files(directory, cands):
+    for cand in cands:
+        write_sheets(os.path.join(directory, sheet_filename(cand)), [cand])
+    return len(cands)
+
+
+def load_sheets(db, rows):
+    # Fiches des lignes rows, pièces jointes lues en une requête pour tout le lot
+    fields = [name for name, _ in db.SHEET_FIELDS]
+    cands = [dict(zip(fields, row)) for row in rows]
+    files = {cand["id"]: [] for cand in cands}
+    for candidate_id, _, _, path, _, _, _ in db.list_files_by_candidates(list(files), "attachment"):
+        files[candidate_id].append(path)
+    for cand in cands:
+        cand["pieces_jointes"] = files[cand["id"]]
+    return cands
+
+
+def iter_chunks(db, filters, chunk_size):
+    # Lignes SHEET_FIELDS des candidats filtrés, par listes de chunk_size
+    rows = []
+    for row in db.iter_candidates(filters, page_size=chunk_size, fields=db.SHEET_FIELDS):
+        rows.append(row)
+        if len(rows) == chunk_size:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+
+@profiler.operation("tache.pdf", rows=lambda count: count)
+def export_candidate(db, candidate_id, path):
+    rows = db.list_candidates_by_ids([candidate_id], fields=db.SHEET_FIELDS)
+    if not rows:
+        raise ValueError("Candidat introuvable")
+    return write_sheets(path, load_sheets(db, rows))
+
+
+def merge_available():
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@profiler.operation("tache.pdf_lot", rows=lambda count: count)
+def export_sheets(db, filters=None, directory=None, merged_path=None, workers=None,
+                  chunk_size=CHUNK_SIZE, progress=None):
+    # Fiches des candidats filtrés : un PDF par candidat dans directory, ou un
+    # seul PDF merged_path. Le rendu est réparti sur un pool de processus par
+    # lots de chunk_size ; progress(fiches, total) renvoie False pour annuler.
+    # Renvoie le nombre de fiches écrites, ou None si annulé.
+    if (directory is None) == (merged_path is None):
+        raise ValueError("Indiquez un dossier ou un fichier PDF de destination.")
+    total = db.count_candidates(filters)
+    if merged_path and not merge_available():
+        return write_merged_serial(db, filters, merged_path, chunk_size, total, progress)
+    workers = workers or os.cpu_count() or 1
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    workdir = tempfile.mkdtemp(prefix="fiches_") if merged_path else None
+    # spawn : pas de fork d'un processus qui a des threads Qt et des connexions SQLite ouvertes
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    pending = set()
+    done = 0
+
+    def drain(return_when):
+        # Attend des lots terminés ; False si l'utilisateur a annulé
+        nonlocal pending, done
+        finished, pending = wait(pending, return_when=return_when)
+        for future in finished:
+            done += future.result()
+        return not (progress and progress(done, total) is False)
+
+    try:
+        parts = 0
+        for rows in iter_chunks(db, filters, chunk_size):
+            pending.add(_submit(pool, db, rows, directory, workdir, parts))
+            parts += 1
+            # Au plus deux lots en attente par processus : mémoire constante
+            if len(pending) >= 2 * workers and not drain(FIRST_COMPLETED):
+                return None
+        if not drain(ALL_COMPLETED):
+            return None
+        if merged_path:
+            if parts == 1:
+                shutil.move(_part_path(workdir, 0), merged_path)
+            elif parts:
+                from pypdf import PdfWriter
+                writer = PdfWriter()
+                for number in range(parts):
+                    writer.append(_part_path(workdir, number))
+                with open(merged_path, "wb") as f:
+                    writer.write(f)
+            else:
+                write_sheets(merged_path, [])
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return done
+
+
+def write_merged_serial(db, filters, merged_path, chunk_size, total, progress=None):
+    # Sans pypdf, pas de fusion : les pages sont écrites l'une après l'autre dans
+    # un seul canvas, lot par lot, sans jamais charger toutes les fiches
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(merged_path, pagesize=letter)
+    done = 0
+    for rows in iter_chunks(db, filters, chunk_size):
+        for cand in load_sheets(db, rows):
+            render_candidate_sheet(c, cand)
+            c.showPage()
+        done += len(rows)
+        if progress and progress(done, total) is False:
+            return None
+    c.save()
+    return done
+
+
+def _submit(pool, db, rows, directory, workdir, number):
+    cands = load_sheets(db, rows)
+    if directory:
+        return pool.submit(write_sheet_files, directory, cands)
+    return pool.submit(write_sheets, _part_path(workdir, number), cands)
+
+
+def _part_path(workdir, number):
+    return os.path.join(workdir, f"{number:06d}.pdf")
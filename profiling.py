@@ -0,0 +1,228 @@
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Activation : CANDIDATURE_PROFIL=<seuil en ms> (0 journalise tout),
+# journal dans CANDIDATURE_PROFIL_LOG
+ENV_THRESHOLD = "CANDIDATURE_PROFIL"
+ENV_LOG = "CANDIDATURE_PROFIL_LOG"
+SLOW_LOG = "operations_lentes.log"
+# Mesures gardées par opération pour les percentiles
+SAMPLES = 1000
+# Requêtes SQL gardées par appel dans le journal
+MAX_QUERIES = 20
+# Méthodes de DatabaseManager qui ne sont pas des opérations
+NOT_OPERATIONS = {"connect", "close", "add_listener", "remove_listener", "notify", "init_database", "filter_clause"}
+
+
+def row_count(result):
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        # (lignes, curseur) de list_candidates_page
+        return len(result[0])
+    if isinstance(result, dict) and "rows_done" in result:
+        return result["rows_done"]
+    return None
+
+
+def percentile(values, fraction):
+    # values triées ; rang le plus proche
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+class Phases:
+    # Durée d'une opération découpée en phases nommées ; finish() enregistre le
+    # total sous name et chaque phase sous name.phase
+    def __init__(self, profiler, name, detail="", start=None):
+        self.profiler = profiler
+        self.name = name
+        self.detail = detail
+        self.start = self.mark = start or time.perf_counter()
+        self.skipped = 0
+        self.phases = {}
+
+    def phase(self, name):
+        # Clôt la phase name : temps écoulé depuis la phase précédente
+        now = time.perf_counter()
+        self.add(name, (now - self.mark) * 1000)
+        self.mark = now
+
+    def skip(self):
+        # Temps écoulé depuis la phase précédente exclu de la mesure (attente de l'utilisateur)
+        now = time.perf_counter()
+        self.skipped += now - self.mark
+        self.mark = now
+
+    def add(self, name, ms):
+        self.phases[name] = self.phases.get(name, 0) + ms
+
+    def total(self):
+        return (time.perf_counter() - self.start - self.skipped) * 1000
+
+    def describe(self):
+        return ", ".join(f"{name} {ms:.1f} ms" for name, ms in self.phases.items())
+
+    def finish(self, rows=None):
+        total = self.total()
+        for name, ms in self.phases.items():
+            self.profiler.record(f"{self.name}.{name}", ms, log=False)
+        self.profiler.record(self.name, total, rows, " | ".join(filter(None, [self.detail, self.describe()])))
+        return total
+
+
+class Profiler:
+    # Mesures facultatives des opérations (appels DatabaseManager, affichage du
+    # tableau, tâches) : percentiles par opération et journal tournant des
+    # opérations plus lentes que le seuil. Inactif, chaque point de mesure ne
+    # coûte qu'un test de enabled.
+    def __init__(self):
+        self.enabled = False
+        self.threshold_ms = None
+        self.log_path = None
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._logger = None
+
+    def enable(self, threshold_ms=200, log_path=SLOW_LOG, max_bytes=1024 * 1024, backups=3):
+        # Importés seulement si les mesures sont activées (démarrage de la ligne de commande)
+        import logging
+        from logging.handlers import RotatingFileHandler
+        self.threshold_ms = threshold_ms
+        self.log_path = log_path
+        logger = logging.getLogger("candidature.profil")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(threadName)s %(message)s"))
+        logger.addHandler(handler)
+        self._logger = logger
+        self.enabled = True
+
+    def enable_from_env(self):
+        value = os.environ.get(ENV_THRESHOLD, "").strip()
+        if value:
+            self.enable(float(value), os.environ.get(ENV_LOG) or SLOW_LOG)
+        return self.enabled
+
+    def record(self, name, ms, rows=None, detail="", log=True):
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=SAMPLES)
+            samples.append(ms)
+        if log and ms >= self.threshold_ms:
+            rows = f" {rows} ligne(s)" if rows is not None else ""
+            self._logger.info("%s %.1f ms%s%s", name, ms, rows, f" | {detail}" if detail else "")
+
+    @contextmanager
+    def timed(self, name, detail=""):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000, detail=detail)
+
+    def phases(self, name, detail=""):
+        # Phases de l'opération name, ou None si les mesures sont inactives
+        return Phases(self, name, detail) if self.enabled else None
+
+    def operation(self, name, rows=row_count):
+        # Décorateur : mesure chaque appel de la fonction sous name
+        def decorate(fn):
+            @functools.wraps(fn)
+            def call(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                result = fn(*args, **kwargs)
+                self.record(name, (time.perf_counter() - start) * 1000, rows(result))
+                return result
+            return call
+        return decorate
+
+    def instrument(self, db):
+        # Mesure chaque appel public de db (DatabaseManager) avec les requêtes
+        # SQL exécutées et le nombre de lignes renvoyées. Les appels imbriqués
+        # sont comptés dans l'appel qui les englobe.
+        import inspect
+        local = threading.local()
+
+        def trace(sql):
+            queries = getattr(local, "queries", None)
+            if queries is not None and len(queries) < MAX_QUERIES:
+                queries.append(" ".join(sql.split()))
+
+        def wrap(name, method):
+            @functools.wraps(method)
+            def call(*args, **kwargs):
+                if getattr(local, "queries", None) is not None:
+                    return method(*args, **kwargs)
+                # Requêtes SQL visibles seulement sur une base locale (pas RemoteDatabase)
+                set_trace = getattr(db.connect(), "set_trace_callback", None)
+                if set_trace:
+                    set_trace(trace)
+                local.queries = []
+                start = time.perf_counter()
+                try:
+                    result = method(*args, **kwargs)
+                finally:
+                    ms = (time.perf_counter() - start) * 1000
+                    queries, local.queries = local.queries, None
+                self.record(f"db.{name}", ms, row_count(result), " ; ".join(queries))
+                return result
+            return call
+
+        def wrap_generator(name, method):
+            # Parcours (iter_candidates) : mesuré jusqu'à la fin de l'itération
+            @functools.wraps(method)
+            def call(*args, **kwargs):
+                start = time.perf_counter()
+                rows = 0
+                try:
+                    for row in method(*args, **kwargs):
+                        rows += 1
+                        yield row
+                finally:
+                    self.record(f"db.{name}", (time.perf_counter() - start) * 1000, rows)
+            return call
+
+        for name, member in inspect.getmembers(type(db)):
+            if name.startswith("_") or name in NOT_OPERATIONS or not inspect.isfunction(member):
+                continue
+            if isinstance(inspect.getattr_static(type(db), name), staticmethod):
+                continue
+            method = getattr(db, name)
+            if inspect.isgeneratorfunction(member):
+                setattr(db, name, wrap_generator(name, method))
+            else:
+                setattr(db, name, wrap(name, method))
+        return db
+
+    def summary(self):
+        # [(opération, appels, p50, p95, max)] en ms, les plus lentes (p95) d'abord
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+        rows = [
+            (name, len(values), percentile(values, 0.5), percentile(values, 0.95), values[-1])
+            for name, values in samples.items() if values
+        ]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._samples = {}
+
+
+profiler = Profiler()
@@ -0,0 +1,185 @@
+import sqlite3
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+
+class _TaskSignals(QObject):
+    result = pyqtSignal(object)
+    error = pyqtSignal(object)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal()
+
+
+class QueryTask(QRunnable):
+    # Exécute fn(*args, **kwargs) dans un thread du pool. Si la tâche fournit
+    # une progression, fn reçoit progress=callback(fait, total) qui renvoie
+    # False quand il faut s'arrêter.
+    def __init__(self, db, fn, args, kwargs, with_progress=False, write=False):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.db = db
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.with_progress = with_progress
+        self.write = write
+        self.signals = _TaskSignals()
+        self.cancelled = False
+        self.stopping = False
+
+    def cancel(self):
+        # Abandon : la requête SQLite en cours est interrompue et le résultat ignoré
+        self.cancelled = True
+
+    def request_stop(self):
+        # Arrêt coopératif : fn s'arrête à la prochaine progression et son résultat est livré
+        self.stopping = True
+
+    def _progress(self, done, total):
+        self.signals.progress.emit(done, total or 0)
+        return not (self.cancelled or self.stopping)
+
+    def run(self):
+        try:
+            if self.cancelled:
+                return
+            # Connexion SQLite du thread ; une base distante (RemoteDatabase) n'en a pas
+            conn = self.db.connect()
+            if isinstance(conn, sqlite3.Connection):
+                conn.set_progress_handler(lambda: 1 if self.cancelled else 0, 1000)
+            try:
+                kwargs = dict(self.kwargs)
+                if self.with_progress:
+                    kwargs["progress"] = self._progress
+                result = self.fn(*self.args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not self.cancelled:
+                    self.signals.error.emit(e)
+            except Exception as e:
+                self.signals.error.emit(e)
+            else:
+                self.signals.result.emit(result)
+            finally:
+                if isinstance(conn, sqlite3.Connection):
+                    conn.set_progress_handler(None, 0)
+        finally:
+            self.signals.finished.emit()
+
+
+class QueryExecutor(QObject):
+    # Lance les appels DatabaseManager hors du thread graphique et livre les
+    # résultats par signaux (donc dans le thread graphique). Une nouvelle tâche
+    # soumise avec la même clé annule la précédente.
+    READ_THREADS = 4
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        # Threads conservés : chacun garde sa connexion SQLite persistante
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(self.READ_THREADS)
+        self.pool.setExpiryTimeout(-1)
+        # Écritures sérialisées sur un seul thread, dans l'ordre de soumission
+        self.write_pool = QThreadPool(self)
+        self.write_pool.setMaxThreadCount(1)
+        self.write_pool.setExpiryTimeout(-1)
+        self._current = {}
+        self._tasks = set()
+
+    def submit(self, fn, *args, key=None, write=False, on_result=None, on_error=None,
+               on_progress=None, **kwargs):
+        if key is not None:
+            self.cancel(key)
+        task = QueryTask(self.db, fn, args, kwargs, with_progress=on_progress is not None, write=write)
+        if key is not None:
+            self._current[key] = task
+        self._tasks.add(task)
+        if on_result:
+            task.signals.result.connect(lambda result: task.cancelled or on_result(result))
+        if on_error:
+            task.signals.error.connect(lambda error: task.cancelled or on_error(error))
+        if on_progress:
+            task.signals.progress.connect(on_progress)
+        task.signals.finished.connect(lambda: self._finished(task, key))
+        (self.write_pool if write else self.pool).start(task)
+        return task
+
+    def _finished(self, task, key):
+        self._tasks.discard(task)
+        if key is not None and self._current.get(key) is task:
+            del self._current[key]
+
+    def cancel(self, key):
+        task = self._current.pop(key, None)
+        if task:
+            task.cancel()
+
+    def shutdown(self):
+        # Les lectures en cours sont abandonnées, les écritures vont à leur terme
+        for task in list(self._tasks):
+            if not task.write:
+                task.cancel()
+        self.pool.waitForDone()
+        self.write_pool.waitForDone()
+
+
+class ChangeNotifier(QObject):
+    # Relaie les événements de DatabaseManager.add_listener vers le thread
+    # graphique : changed(type, ids) est émis depuis le thread d'écriture et
+    # livré en connexion différée.
+    changed = pyqtSignal(str, list)
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        db.add_listener(self._on_change)
+        self.destroyed.connect(lambda: db.remove_listener(self._on_change))
+
+    def _on_change(self, kind, ids):
+        self.changed.emit(kind, ids)
+
+    def close(self):
+        self.db.remove_listener(self._on_change)
+
+
+class WriteQueue(QObject):
+    # Regroupe les modifications de cellules : seule la dernière valeur de chaque
+    # (candidat, champ) est gardée, et le tout part en une transaction toutes les
+    # interval ms via update(changes) -> {(id, champ): message}. failed reçoit
+    # [(id, champ, valeur d'avant, message)] pour les lignes refusées.
+    failed = pyqtSignal(list)
+
+    def __init__(self, executor, update, interval=300, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.update = update
+        self._pending = {}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.flush)
+
+    def put(self, candidate_id, field, value, previous):
+        key = (candidate_id, field)
+        if key in self._pending:
+            # La valeur à restaurer reste celle d'avant la première modification
+            previous = self._pending[key][1]
+        self._pending[key] = (value, previous)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        self.timer.stop()
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        changes = [(candidate_id, field, value) for (candidate_id, field), (value, _) in batch.items()]
+
+        def on_result(failures):
+            if failures:
+                self.failed.emit([key + (batch[key][1], message) for key, message in failures.items()])
+
+        def on_error(error):
+            self.failed.emit([key + (previous, str(error)) for key, (_, previous) in batch.items()])
+
+        self.executor.submit(self.update, changes, write=True, on_result=on_result, on_error=on_error)
@@ -0,0 +1,261 @@
+import http.client
+import json
+import select
+import threading
+from urllib.parse import urlsplit
+
+from candidature_core import DatabaseManager
+
+# Adresse du service (candidature_server.py) ; sans elle, accès direct au fichier
+ENV_SERVER = "CANDIDATURE_SERVEUR"
+TIMEOUT = 120
+
+
+def rows(values):
+    # Lignes JSON (listes) -> tuples, comme sqlite3
+    return [tuple(row) for row in values]
+
+
+class RemoteDatabase:
+    # Même interface que DatabaseManager pour l'application, les appels passant
+    # par le service partagé. Une connexion HTTP persistante par thread (pool de
+    # QueryExecutor compris). Les écouteurs reçoivent nos propres écritures tout
+    # de suite, celles des autres postes par watcher().
+    LIST_FIELDS = DatabaseManager.LIST_FIELDS
+    EXPORT_FIELDS = DatabaseManager.EXPORT_FIELDS
+    SHEET_FIELDS = DatabaseManager.SHEET_FIELDS
+    NOTES_PREVIEW = DatabaseManager.NOTES_PREVIEW
+    FIELD_NAMES = {LIST_FIELDS: "list", EXPORT_FIELDS: "export", SHEET_FIELDS: "sheet"}
+
+    def __init__(self, url):
+        parts = urlsplit(url if "//" in url else f"http://{url}")
+        self.url = url
+        self.path = url
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 8765
+        self._local = threading.local()
+        self._listeners = []
+        self._connections = []
+        self._lock = threading.Lock()
+        # Jeton de session donné par authenticate, commun à tous les threads
+        self.token = None
+
+    def connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=TIMEOUT)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        if self.token:
+            try:
+                self._call("logout")
+            except (ConnectionError, PermissionError):
+                pass
+            self.token = None
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def notify(self, kind, ids):
+        for callback in list(self._listeners):
+            callback(kind, list(ids))
+
+    def _call(self, operation, retry=True, **params):
+        # Une connexion coupée est rouverte une fois. Une écriture (retry=False)
+        # n'est renvoyée que si elle n'a pas pu partir : coupée après l'envoi,
+        # elle a peut-être été validée. Service injoignable : ConnectionError.
+        body = json.dumps(params, ensure_ascii=False).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        for attempt in range(2):
+            conn = self.connect()
+            if conn.sock is not None and select.select([conn.sock], [], [], 0)[0]:
+                # Connexion fermée par le service pendant l'attente : rouverte avant l'envoi
+                conn.close()
+            sent = False
+            try:
+                conn.request("POST", f"/api/{operation}", body, headers)
+                sent = True
+                response = conn.getresponse()
+                data = json.loads(response.read() or b"{}")
+                break
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                if attempt or (sent and not retry):
+                    raise ConnectionError(f"Service injoignable ({self.url}) : {e}") from e
+        if response.status == 400:
+            raise ValueError(data.get("error"))
+        if response.status in (401, 403):
+            raise PermissionError(data.get("error"))
+        if response.status != 200:
+            raise Exception(data.get("error") or f"Erreur du service ({response.status})")
+        return data["result"]
+
+    def _fields(self, fields):
+        if fields is None:
+            return None
+        if fields not in self.FIELD_NAMES:
+            raise ValueError("Projection non disponible à distance")
+        return self.FIELD_NAMES[fields]
+
+    # --- Lectures ---
+
+    def authenticate(self, username, password):
+        # Ouvre la session du service ; renvoie le rôle, comme DatabaseManager
+        session = self._call("authenticate", username=username, password=password)
+        if not session:
+            return None
+        self.token = session["token"]
+        return session["role"]
+
+    def search_candidates(self, filters):
+        return rows(self._call("search_candidates", filters=filters))
+
+    def list_candidates_page(self, filters=None, after_id=None, page_size=200, fields=None):
+        page, cursor = self._call("list_candidates_page", filters=filters, after_id=after_id,
+                                  page_size=page_size, fields=self._fields(fields))
+        return rows(page), cursor
+
+    def list_candidates_by_ids(self, ids, filters=None, fields=None):
+        return rows(self._call("list_candidates_by_ids", ids=list(ids), filters=filters, fields=self._fields(fields)))
+
+    def iter_candidates(self, filters=None, page_size=1000, fields=None):
+        cursor = None
+        while True:
+            page, cursor = self.list_candidates_page(filters, cursor, page_size, fields)
+            yield from page
+            if cursor is None:
+                return
+
+    def count_candidates(self, filters=None):
+        return self._call("count_candidates", filters=filters)
+
+    def search_text(self, text, limit=50):
+        return rows(self._call("search_text", text=text, limit=limit))
+
+    def get_candidate_by_id(self, candidate_id):
+        row = self._call("get_candidate_by_id", candidate_id=candidate_id)
+        return tuple(row) if row is not None else None
+
+    def get_candidate_files(self, candidate_id, kind=None):
+        return rows(self._call("get_candidate_files", candidate_id=candidate_id, kind=kind))
+
+    def list_files_by_candidates(self, candidate_ids, kind=None):
+        return rows(self._call("list_files_by_candidates", candidate_ids=list(candidate_ids), kind=kind))
+
+    def get_file_stats(self):
+        return self._call("get_file_stats")
+
+    def get_breakdown(self):
+        return self._call("get_breakdown")
+
+    def get_stats(self):
+        return self._call("get_stats")
+
+    def get_import_checkpoint(self, source, signature):
+        return self._call("get_import_checkpoint", source=source, signature=signature)
+
+    def orphan_files(self, grace_seconds=3600):
+        return self._call("orphan_files", grace_seconds=grace_seconds)
+
+    def get_changes(self, since=None):
+        return self._call("get_changes", since=since)
+
+    def watcher(self):
+        return RemoteChangeWatcher(self)
+
+    # --- Écritures ---
+
+    def add_user(self, username, password, role):
+        self._call("add_user", retry=False, username=username, password=password, role=role)
+
+    def change_password(self, username, old_password, new_password):
+        return self._call("change_password", retry=False, username=username, old_password=old_password,
+                          new_password=new_password)
+
+    def add_candidate(self, data):
+        candidate_id = self._call("add_candidate", retry=False, data=list(data))
+        self.notify("inserted", [candidate_id])
+        return candidate_id
+
+    def bulk_add_candidates(self, df, checkpoint=None):
+        frame = json.loads(df.to_json(orient="split", date_format="iso", force_ascii=False))
+        report = self._call("bulk_add_candidates", retry=False, frame=frame, checkpoint=checkpoint)
+        # Ids des nouveaux candidats inconnus ici : signalés par watcher()
+        report["invalid"] = [tuple(item) for item in report["invalid"]]
+        return report
+
+    def clear_import_checkpoint(self, source):
+        self._call("clear_import_checkpoint", retry=False, source=source)
+
+    def update_statut(self, candidate_id, new_statut):
+        self.update_candidates([(candidate_id, "statut", new_statut)])
+
+    def update_priorite(self, candidate_id, new_priorite):
+        self.update_candidates([(candidate_id, "priorite", new_priorite)])
+
+    def update_candidates(self, changes):
+        changes = [list(change) for change in changes]
+        failures = {(i, field): message for i, field, message in self._call("update_candidates", retry=False, changes=changes)}
+        updated = sorted({i for i, field, _ in changes if (i, field) not in failures}, reverse=True)
+        if updated:
+            self.notify("updated", updated)
+        return failures
+
+    def delete_candidates(self, ids):
+        ids = list(ids)
+        deleted = self._call("delete_candidates", retry=False, ids=ids)
+        self.notify("deleted", ids)
+        return deleted
+
+    def delete_candidate(self, candidate_id):
+        self._call("delete_candidate", retry=False, candidate_id=candidate_id)
+        self.notify("deleted", [candidate_id])
+
+    def register_file(self, path, sha256, size):
+        self._call("register_file", retry=False, path=path, sha256=sha256, size=size)
+
+    def forget_file(self, path):
+        return self._call("forget_file", retry=False, path=path)
+
+
+class RemoteChangeWatcher:
+    # Équivalent de ChangeWatcher : le journal des changements est relu par le
+    # service, depuis le dernier numéro vu. Nos propres écritures y figurent
+    # aussi et sont signalées une seconde fois, sans autre effet qu'un
+    # rafraîchissement. Service injoignable : rien de signalé, le point de
+    # départ est relu au retour du service.
+    def __init__(self, db):
+        self.db = db
+        self.last_seq = None
+        self.poll()
+
+    def poll(self):
+        try:
+            if self.last_seq is None:
+                self.last_seq = self.db.get_changes()["seq"]
+                return []
+            result = self.db.get_changes(self.last_seq)
+        except ConnectionError:
+            return []
+        self.last_seq = result["seq"]
+        changes = [(kind, ids) for kind, ids in result["changes"]]
+        for kind, ids in changes:
+            self.db.notify(kind, ids)
+        return changes
+
+    def close(self):
+        pass
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import generate  # noqa: E402
+from candidature_core import DatabaseManager  # noqa: E402
+
+SEEDED_ROWS = 3000
+
+
+@pytest.fixture
+def seeded_db(tmp_path, monkeypatch):
+    # Base synthétique reproductible ; photos/ et attachments/ créés dans tmp_path
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(generate, "PHOTO_POOL", 5)
+    monkeypatch.setattr(generate, "ATTACHMENT_POOL", 5)
+    path = generate.generate_database(str(tmp_path / "candidatures.db"), SEEDED_ROWS, seed=42)
+    db = DatabaseManager(path)
+    yield db
+    db.close()
@@ -0,0 +1,35 @@
+import sqlite3
+
+from candidature_core import DatabaseManager
+
+
+def data_version(conn):
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def test_startup_does_not_write_when_changelog_is_small(tmp_path):
+    path = str(tmp_path / "journal.db")
+    DatabaseManager(path).close()
+    other = sqlite3.connect(path)
+    version = data_version(other)
+    DatabaseManager(path).close()
+    assert data_version(other) == version
+    other.close()
+
+
+def test_startup_prunes_oversized_changelog(tmp_path, monkeypatch):
+    monkeypatch.setattr(DatabaseManager, "CHANGELOG_KEEP", 100)
+    monkeypatch.setattr(DatabaseManager, "CHANGELOG_SLACK", 10)
+    path = str(tmp_path / "journal.db")
+    DatabaseManager(path).close()
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO candidate_changes (candidate_id, kind) VALUES (?, 'updated')",
+                         [(i,) for i in range(105)])
+    DatabaseManager(path).close()
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO candidate_changes (candidate_id, kind) VALUES (?, 'updated')",
+                         [(i,) for i in range(20)])
+    db = DatabaseManager(path)
+    low, high, count = db.connect().execute("SELECT MIN(seq), MAX(seq), COUNT(*) FROM candidate_changes").fetchone()
+    db.close()
+    assert (high, count) == (125, 100)
@@ -0,0 +1,43 @@
+import os
+
+import candidature_cli
+from candidature_core import DatabaseManager
+from file_store import FileStore
+
+
+def test_vacuum_with_relative_db_in_another_folder(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    data.mkdir()
+    monkeypatch.chdir(data)
+    db = DatabaseManager("base.db")
+    source = tmp_path / "piece.pdf"
+    source.write_bytes(b"orphelin")
+    stored = FileStore("attachments", db).put(str(source))
+    db.connect().execute("UPDATE stored_files SET created_at = datetime('now', '-2 hours')")
+    db.connect().commit()
+    db.close()
+
+    monkeypatch.chdir(tmp_path)
+    assert candidature_cli.main(["-q", "--db", "data/base.db", "vacuum", "--fichiers"]) == 0
+    assert not (data / stored).exists()
+    assert (tmp_path / "data" / "base.db").exists()
+    assert not (tmp_path / "attachments").exists()
+    assert not (tmp_path / "photos").exists()
+
+
+def test_store_paths_are_relative_to_a_relative_base(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    db = DatabaseManager("data/base.db")
+    source = tmp_path / "piece.pdf"
+    source.write_bytes(b"orphelin")
+    store = FileStore("attachments", db, base="data")
+    stored = store.put(str(source))
+    assert stored.startswith("attachments" + os.sep)
+    assert (tmp_path / "data" / stored).read_bytes() == b"orphelin"
+    db.connect().execute("UPDATE stored_files SET created_at = datetime('now', '-2 hours')")
+    db.connect().commit()
+    assert store.collect_garbage() == 1
+    assert not (tmp_path / "data" / stored).exists()
+    assert os.listdir(tmp_path / "data" / "attachments") == []
+    db.close()
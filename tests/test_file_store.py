@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from candidature_core import DatabaseManager
+from file_store import FileStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = DatabaseManager("store.db")
+    yield FileStore("attachments", db)
+    db.close()
+
+
+def source(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def refcount(db, path):
+    return db.connect().execute("SELECT refcount FROM stored_files WHERE path = ?", (path,)).fetchone()[0]
+
+
+def age_files(db):
+    with db.connect() as conn:
+        conn.execute("UPDATE stored_files SET created_at = datetime('now', '-2 hours')")
+
+
+def candidate(n, attachments):
+    return (f"Fichier {n}", "Testeur", f"fichier{n}@exemple.fr", "", "2024-01-01",
+            "En attente", "Basse", "", None, attachments, None, "Autre")
+
+
+def test_identical_content_is_stored_once(store, tmp_path):
+    first = store.put(source(tmp_path, "cv.pdf", b"meme contenu"))
+    second = store.put(source(tmp_path, "autre_nom.pdf", b"meme contenu"))
+    other = store.put(source(tmp_path, "cv.pdf", b"autre contenu"))
+    assert first == second != other
+    assert os.path.basename(first) == "cv.pdf"
+    assert store.db.connect().execute("SELECT COUNT(*) FROM stored_files").fetchone()[0] == 2
+    files = [os.path.join(d, f) for d, _, names in os.walk(store.root) for f in names]
+    assert len(files) == 2
+
+
+def test_refcounts_follow_candidates(store, tmp_path):
+    path = store.put(source(tmp_path, "cv.pdf", b"partage"))
+    assert refcount(store.db, path) == 0
+    ids = [store.db.add_candidate(candidate(n, [path])) for n in range(2)]
+    assert refcount(store.db, path) == 2
+    store.db.delete_candidate(ids[0])
+    assert refcount(store.db, path) == 1
+    store.db.delete_candidates(ids[1:])
+    assert refcount(store.db, path) == 0
+
+
+def test_garbage_collection_waits_for_the_grace_period(store, tmp_path):
+    kept = store.put(source(tmp_path, "garde.pdf", b"reference"))
+    orphan = store.put(source(tmp_path, "orphelin.pdf", b"orphelin"))
+    store.db.add_candidate(candidate(1, [kept]))
+    # Tout juste rangé : peut-être un formulaire en cours de saisie
+    assert store.collect_garbage(grace_seconds=3600) == 0
+    assert os.path.exists(orphan)
+    age_files(store.db)
+    assert store.collect_garbage(grace_seconds=3600) == 1
+    assert not os.path.exists(orphan)
+    assert not os.path.exists(os.path.dirname(orphan))
+    assert os.path.exists(kept)
+    assert store.db.orphan_files(0) == []
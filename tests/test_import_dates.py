@@ -0,0 +1,33 @@
+import pytest
+
+from candidature_core import DatabaseManager
+
+pd = pytest.importorskip("pandas")
+
+
+def import_frame(dates):
+    return pd.DataFrame({
+        "Nom": [f"Date {i}" for i in range(len(dates))], "Poste": "Comptable",
+        "Email": [f"date{i}@exemple.fr" for i in range(len(dates))], "Téléphone": "",
+        "Date": dates, "Statut": "", "Priorité": "Moyenne", "Notes": "",
+    })
+
+
+def stored_dates(db):
+    return [d for (d,) in db.connect().execute("SELECT date_candidature FROM candidates ORDER BY id")]
+
+
+def test_french_dates_do_not_depend_on_first_row(tmp_path):
+    db = DatabaseManager(str(tmp_path / "dates.db"))
+    report = db.bulk_add_candidates(import_frame(["03/02/2024", "13/02/2024", "2024-02-03", "3/2/2024"]))
+    assert report["invalid"] == []
+    assert stored_dates(db) == ["2024-02-03", "2024-02-13", "2024-02-03", "2024-02-03"]
+    db.close()
+
+
+def test_excel_cells_and_invalid_dates(tmp_path):
+    db = DatabaseManager(str(tmp_path / "dates.db"))
+    report = db.bulk_add_candidates(import_frame([pd.Timestamp("2024-05-06"), "31/02/2024", "", "demain"]))
+    assert stored_dates(db) == ["2024-05-06"]
+    assert [reason for _, reason in report["invalid"]] == ["Date invalide"] * 3
+    db.close()
@@ -0,0 +1,86 @@
+import pytest
+
+pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+
+import import_pipeline  # noqa: E402
+from candidature_core import DatabaseManager  # noqa: E402
+
+HEADER = ["Nom", "Poste", "Email", "Téléphone", "Date", "Statut", "Priorité", "Notes"]
+
+
+def candidate(i, email=None):
+    return [f"Candidat {i}", "Comptable", email or f"cand{i}@exemple.fr", "", "03/02/2024", "", "Moyenne", ""]
+
+
+def write_sheet(path, rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(HEADER)
+    for row in rows:
+        ws.append(row or [None] * len(HEADER))
+    wb.save(path)
+    return str(path)
+
+
+def test_blank_rows_keep_sheet_line_numbers(tmp_path):
+    # Lignes de feuille : 2 valide, 3-4 vides, 5 valide, 6 email invalide
+    path = write_sheet(tmp_path / "import.xlsx", [candidate(0), None, None, candidate(3), candidate(4, "pas-un-email")])
+    db = DatabaseManager(str(tmp_path / "import.db"))
+    report = import_pipeline.import_file(db, path)
+    assert report["errors"] == [(6, "Email invalide")]
+    assert (report["rows_done"], report["inserted"], report["invalid"]) == (5, 2, 1)
+    db.close()
+
+
+def test_resume_after_blank_rows_does_not_reprocess(tmp_path):
+    path = write_sheet(tmp_path / "import.xlsx", [candidate(0), None, None, candidate(3), candidate(4, "pas-un-email")])
+    db = DatabaseManager(str(tmp_path / "import.db"))
+    first = import_pipeline.import_file(db, path, batch_size=2, progress=lambda done, total: done == 0)
+    assert (first["rows_done"], first["inserted"], first["completed"]) == (4, 2, False)
+    report = import_pipeline.import_file(db, path, batch_size=2)
+    assert (report["resumed_from"], report["rows_done"]) == (4, 5)
+    assert (report["inserted"], report["skipped"], report["invalid"]) == (2, 0, 1)
+    db.close()
+
+
+def write_csv(path, lines):
+    path.write_text(",".join(HEADER) + "\n" + "".join(line + "\n" for line in lines), encoding="utf-8")
+    return str(path)
+
+
+def csv_line(i, email=None, notes=""):
+    return ",".join(candidate(i, email)[:-1] + [notes])
+
+
+def test_csv_resume_with_blank_lines_and_multiline_fields(tmp_path):
+    # Lignes du tableau : 2 valide, 3-4 vides, 5 notes sur deux lignes, 6-8 valides, 9 email invalide
+    lines = [csv_line(0), "", "", csv_line(3, notes='"Première ligne\nseconde ligne"'),
+             csv_line(4), csv_line(5), csv_line(6), csv_line(7, "pas-un-email")]
+    path = write_csv(tmp_path / "import.csv", lines)
+    db = DatabaseManager(str(tmp_path / "import.db"))
+    first = import_pipeline.import_file(db, path, batch_size=3, progress=lambda done, total: done == 0)
+    assert (first["rows_done"], first["inserted"]) == (1, 1)
+    report = import_pipeline.import_file(db, path, batch_size=3)
+    assert (report["resumed_from"], report["rows_done"], report["completed"]) == (1, 8, True)
+    assert (report["inserted"], report["skipped"], report["invalid"]) == (5, 0, 1)
+    assert report["errors"] == [(9, "Email invalide")]
+    notes = db.connect().execute("SELECT notes FROM candidates WHERE email = 'cand3@exemple.fr'").fetchone()[0]
+    assert notes == "Première ligne\nseconde ligne"
+    db.close()
+
+
+def test_csv_resume_far_into_the_file_keeps_memory_bounded(tmp_path):
+    import tracemalloc
+    skip = 300000
+    path = tmp_path / "grand.csv"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(HEADER) + "\n")
+        f.write("x,,,,,,,\n" * skip)
+        f.write(csv_line(0) + "\n")
+    tracemalloc.start()
+    batches = list(import_pipeline.iter_batches(str(path), batch_size=100, skip=skip))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert [list(batch.index) for batch in batches] == [[skip]]
+    assert peak < 4 * 1024 * 1024
@@ -0,0 +1,138 @@
+import sqlite3
+
+from candidature_core import DatabaseManager
+
+# Schéma de la version d'origine de l'application, avant PRAGMA user_version
+BASELINE_SCHEMA = '''
+    CREATE TABLE candidates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nom_complet TEXT NOT NULL,
+        poste_demande TEXT NOT NULL,
+        email TEXT NOT NULL UNIQUE,
+        telephone TEXT,
+        date_candidature TEXT NOT NULL,
+        statut TEXT NOT NULL,
+        priorite TEXT,
+        notes TEXT,
+        cv_path TEXT,
+        attachments TEXT,
+        photo_path TEXT,
+        source TEXT,
+        date_creation TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL CHECK(role IN ('admin', 'user'))
+    );
+'''
+
+
+def baseline_database(path, candidates):
+    # candidates : [(nom, statut, cv, photo, "a;b;c")]
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany('''
+        INSERT INTO candidates (nom_complet, poste_demande, email, date_candidature, statut,
+                                priorite, cv_path, photo_path, attachments, source)
+        VALUES (?, 'Comptable', ?, '2023-05-01', ?, 'Moyenne', ?, ?, ?, 'LinkedIn')
+    ''', [(name, f"{name.lower()}@exemple.fr", statut, cv, photo, attachments)
+          for name, statut, cv, photo, attachments in candidates])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_semicolon_attachments_move_to_candidate_files(tmp_path):
+    path = baseline_database(str(tmp_path / "ancienne.db"), [
+        ("Alice", "En attente", "attachments/cv_alice.pdf", "photos/alice.jpg",
+         "attachments/lettre.pdf; attachments/diplome.pdf;;attachments/lettre.pdf"),
+        ("Bruno", "Entretien", None, None, ""),
+        ("Chloé", "Refusé", None, "photos/chloe.png", None),
+    ])
+    db = DatabaseManager(path)
+    files = {name: db.get_candidate_files(i) for i, name in ((1, "Alice"), (2, "Bruno"), (3, "Chloé"))}
+    assert [(kind, p) for _, kind, p, _, _, _ in files["Alice"]] == [
+        ("attachment", "attachments/lettre.pdf"), ("attachment", "attachments/diplome.pdf"),
+        ("attachment", "attachments/lettre.pdf"), ("cv", "attachments/cv_alice.pdf"), ("photo", "photos/alice.jpg"),
+    ]
+    assert files["Bruno"] == []
+    assert [(kind, mime) for _, kind, _, _, _, mime in files["Chloé"]] == [("photo", "image/png")]
+    conn = db.connect()
+    assert conn.execute("SELECT COUNT(*) FROM candidates WHERE attachments IS NOT NULL").fetchone()[0] == 0
+    positions = conn.execute(
+        "SELECT position FROM candidate_files WHERE candidate_id = 1 AND kind = 'attachment' ORDER BY position"
+    ).fetchall()
+    assert positions == [(0,), (1,), (2,)]
+    db.close()
+    # Relancer l'application ne reprend pas les chemins une seconde fois
+    db = DatabaseManager(path)
+    assert db.connect().execute("SELECT COUNT(*) FROM candidate_files").fetchone()[0] == 6
+    db.close()
+
+
+def user_version(db):
+    return db.connect().execute("PRAGMA user_version").fetchone()[0]
+
+
+def schema_objects(db):
+    return {name for (name,) in db.connect().execute(
+        "SELECT name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' AND name NOT LIKE 'candidates_fts_%'")}
+
+
+def test_baseline_database_is_migrated_to_the_latest_version(tmp_path):
+    path = baseline_database(str(tmp_path / "ancienne.db"), [
+        ("Alice", "En attente", None, None, None), ("Bruno", "Entretien", None, None, None),
+    ])
+    db = DatabaseManager(path)
+    assert user_version(db) == len(DatabaseManager.MIGRATIONS)
+    fresh = DatabaseManager(str(tmp_path / "neuve.db"))
+    assert schema_objects(db) == schema_objects(fresh)
+    fresh.close()
+    # Index plein texte et compteurs construits sur les lignes existantes
+    assert [row[0] for row in db.search_text("bru")] == [2]
+    assert db.get_breakdown()["statut"] == {"En attente": 1, "Entretien": 1}
+    assert db.authenticate("admin", "admin") == "admin"
+    db.close()
+
+
+def test_partially_migrated_database_resumes_at_its_version(tmp_path):
+    # Base restée à la version 3 (candidates, plein texte, index de filtres)
+    path = str(tmp_path / "partielle.db")
+    conn = sqlite3.connect(path)
+    for step in DatabaseManager.MIGRATIONS[:3]:
+        step(DatabaseManager, conn.cursor())
+    conn.execute("""
+        INSERT INTO candidates (nom_complet, poste_demande, email, date_candidature, statut, priorite, source)
+        VALUES ('Alice', 'Comptable', 'alice@exemple.fr', '2024-01-01', 'Accepté', 'Haute', 'Autre')
+    """)
+    # Témoin : l'étape 3 n'est pas rejouée, cet index ne revient pas
+    conn.execute("DROP INDEX idx_candidates_statut")
+    conn.execute("PRAGMA user_version = 3")
+    conn.commit()
+    conn.close()
+    db = DatabaseManager(path)
+    assert user_version(db) == len(DatabaseManager.MIGRATIONS)
+    indexes = {name for (name,) in db.connect().execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "idx_candidates_statut" not in indexes and "idx_candidate_files_candidate" in indexes
+    assert db.get_stats()["accepte"] == 1
+    assert db.get_changes()["seq"] == 0
+    db.close()
+
+
+def test_pre_version_database_with_part_of_the_schema(tmp_path):
+    # Version 0 mais tables déjà créées par une ancienne mise à jour : chaque
+    # étape tient compte de l'existant, sans doublon dans les compteurs
+    path = baseline_database(str(tmp_path / "ancienne.db"),
+                             [("Alice", "En attente", None, None, "attachments/lettre.pdf")])
+    db = DatabaseManager(path)
+    with db.connect() as conn:
+        conn.execute("PRAGMA user_version = 0")
+    db.close()
+    db = DatabaseManager(path)
+    assert user_version(db) == len(DatabaseManager.MIGRATIONS)
+    assert db.get_breakdown()["statut"] == {"En attente": 1}
+    assert [row[0] for row in db.search_text("alice")] == [1]
+    assert len(db.get_candidate_files(1)) == 1
+    db.close()
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("reportlab")
+pytest.importorskip("PIL")
+
+import pdf_export  # noqa: E402
+
+
+def test_sheet_photo_is_downscaled(tmp_path):
+    from PIL import Image
+    path = str(tmp_path / "photo.jpg")
+    Image.new("RGB", (3000, 2000), "red").save(path)
+    assert max(pdf_export.image_reader(path).getSize()) == pdf_export.PHOTO_PIXELS
+
+
+def test_merged_without_pypdf_streams_every_sheet(seeded_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_export, "merge_available", lambda: False)
+    seen = []
+    path = str(tmp_path / "fiches.pdf")
+    filters = {"statut": "Accepté"}
+    count = pdf_export.export_sheets(seeded_db, filters, merged_path=path, chunk_size=100,
+                                     progress=lambda done, total: seen.append(done))
+    assert count == seeded_db.count_candidates(filters) == seen[-1]
+    assert seen == sorted(seen) and len(seen) > 1
+    assert open(path, "rb").read(5) == b"%PDF-"
+
+
+def test_load_sheets_matches_per_candidate_files(seeded_db):
+    rows = seeded_db.list_candidates_page(None, None, 50, seeded_db.SHEET_FIELDS)[0]
+    for cand in pdf_export.load_sheets(seeded_db, rows):
+        files = seeded_db.get_candidate_files(cand["id"], "attachment")
+        assert cand["pieces_jointes"] == [path for _, _, path, _, _, _ in files]
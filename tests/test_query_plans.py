@@ -0,0 +1,15 @@
+def test_every_filter_combination_uses_an_index(seeded_db):
+    assert seeded_db.check_query_plans() == []
+
+
+def test_full_scan_is_reported(seeded_db):
+    # Sans les index de filtres, les requêtes filtrées parcourent toute la table
+    conn = seeded_db.connect()
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_candidates_%'"
+    ).fetchall():
+        conn.execute(f"DROP INDEX {name}")
+    problems = seeded_db.check_query_plans()
+    queries = {query for query, _, _ in problems}
+    assert {"list_candidates_page", "count_candidates"} <= queries
+    assert all(any("SCAN candidates" in d for d in details) for _, _, details in problems)
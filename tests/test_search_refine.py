@@ -0,0 +1,17 @@
+import pytest
+
+CandidatesModel = pytest.importorskip("candidature_manager").CandidatesModel
+
+
+def test_longer_global_search_is_not_refined_in_memory():
+    assert not CandidatesModel.narrows({"texte": "dup"}, {"texte": "dupont"})
+
+
+def test_clearing_global_search_reloads():
+    assert not CandidatesModel.narrows({"texte": "dupont"}, {"texte": ""})
+    assert not CandidatesModel.narrows({"texte": "dupont"}, {"nom_complet": "a"})
+
+
+def test_longer_name_filter_narrows():
+    assert CandidatesModel.narrows({"nom_complet": "dup"}, {"nom_complet": "dupont"})
+    assert not CandidatesModel.narrows({"nom_complet": "dupont"}, {"nom_complet": "dup"})
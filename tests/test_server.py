@@ -0,0 +1,142 @@
+import asyncio
+import threading
+
+import pytest
+
+import candidature_server
+from candidature_core import DatabaseManager
+from candidature_server import CandidatureService
+from remote_database import RemoteDatabase
+
+
+def candidate(n):
+    return (f"Service {n}", "Testeur", f"service{n}@exemple.fr", "", "2024-01-01",
+            "En attente", "Basse", "", None, [], None, "Autre")
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    # Service sur un port libre de localhost, boucle asyncio dans un thread
+    monkeypatch.setattr(candidature_server, "LOGIN_DELAY", 0)
+    db = DatabaseManager(str(tmp_path / "service.db"))
+    db.add_user("lecteur", "secret", "user")
+    loop = asyncio.new_event_loop()
+    service = CandidatureService(db)
+    server = loop.run_until_complete(service.start(port=0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    service.url = f"127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    yield service
+    asyncio.run_coroutine_threadsafe(service.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+    db.close()
+
+
+def client(service, username=None, password=None):
+    remote = RemoteDatabase(service.url)
+    if username:
+        assert remote.authenticate(username, password)
+    return remote
+
+
+def test_calls_require_a_session(service):
+    remote = client(service)
+    assert remote.authenticate("admin", "mauvais") is None
+    with pytest.raises(PermissionError):
+        remote.get_stats()
+    with pytest.raises(PermissionError):
+        remote.add_user("mallory", "pw", "admin")
+    remote.close()
+
+
+def test_roles_are_checked_by_the_service(service):
+    admin = client(service, "admin", "admin")
+    user = client(service, "lecteur", "secret")
+    candidate_id = user.add_candidate(candidate(1))
+    for call in (lambda: user.delete_candidates([candidate_id]), lambda: user.add_user("x", "pw", "admin"),
+                 lambda: user.forget_file("attachments/x")):
+        with pytest.raises(PermissionError):
+            call()
+    # Seul le mot de passe de l'utilisateur connecté peut changer
+    assert user.change_password("admin", "secret", "nouveau")
+    assert client(service).authenticate("admin", "admin") == "admin"
+    assert admin.delete_candidates([candidate_id]) == 1
+    admin.close()
+    user.close()
+
+
+def test_concurrent_adds_and_cache(service):
+    remote = client(service, "admin", "admin")
+    threads = [threading.Thread(target=remote.add_candidate, args=(candidate(n),)) for n in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert remote.count_candidates({}) == 20
+    with pytest.raises(Exception, match="existe déjà"):
+        remote.add_candidate(candidate(0))
+    rows, _ = remote.list_candidates_page()
+    candidate_id = rows[0][0]
+    assert remote.get_candidate_by_id(candidate_id)[6] == "En attente"
+    # Écriture directe sur le fichier : le cache du service est vidé
+    local = DatabaseManager(service.db.path)
+    local.update_statut(candidate_id, "Accepté")
+    local.close()
+    assert remote.get_candidate_by_id(candidate_id)[6] == "Accepté"
+    assert remote.update_candidates([(candidate_id, "nom_complet", "x")]) == {
+        (candidate_id, "nom_complet"): "Champ non modifiable : nom_complet"}
+    remote.close()
+
+
+@pytest.fixture
+def dropping_server():
+    # Lit chaque requête puis ferme la connexion sans répondre
+    import socket
+    listener = socket.create_server(("127.0.0.1", 0))
+    received = []
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            received.append(conn.recv(65536).split(b" ", 2)[1].decode())
+            conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"127.0.0.1:{listener.getsockname()[1]}", received
+    listener.close()
+
+
+def test_writes_are_not_resent_after_a_dropped_response(dropping_server):
+    url, received = dropping_server
+    remote = RemoteDatabase(url)
+    with pytest.raises(ConnectionError):
+        remote.add_candidate(candidate(1))
+    assert received == ["/api/add_candidate"]
+    with pytest.raises(ConnectionError):
+        remote.count_candidates({})
+    assert received[1:] == ["/api/count_candidates"] * 2
+
+
+def test_unreachable_service_raises_connection_error():
+    remote = RemoteDatabase("127.0.0.1:1")
+    with pytest.raises(ConnectionError):
+        remote.authenticate("admin", "admin")
+    # Le suivi des changements attend le retour du service
+    assert remote.watcher().poll() == []
+
+
+def test_stale_import_checkpoint_is_dropped_by_the_writer(service):
+    with service.db.connect() as conn:
+        conn.execute("INSERT INTO import_jobs (source, signature, rows_done, inserted, skipped, invalid) "
+                     "VALUES ('/import.xlsx', 'ancienne', 10, 8, 1, 1)")
+    assert "get_import_checkpoint" in candidature_server.WRITE_OPERATIONS - candidature_server.READ_OPERATIONS
+    remote = client(service, "lecteur", "secret")
+    assert remote.get_import_checkpoint("/import.xlsx", "ancienne")["rows_done"] == 10
+    assert remote.get_import_checkpoint("/import.xlsx", "nouvelle") is None
+    assert service.db.get_import_checkpoint("/import.xlsx", "ancienne") is None
+    remote.close()
@@ -0,0 +1,49 @@
+import pytest
+
+from candidature_core import DatabaseManager
+
+
+def counted(db):
+    # Répartition recalculée sur candidates, à comparer aux compteurs
+    conn = db.connect()
+    breakdown = {}
+    for d in DatabaseManager.STAT_DIMENSIONS:
+        rows = conn.execute(f"SELECT COALESCE({d}, ''), COUNT(*) FROM candidates GROUP BY 1").fetchall()
+        breakdown[d] = dict(rows)
+    return breakdown
+
+
+def candidate(n, statut="En attente", priorite="Basse", source="Autre"):
+    return (f"Stat {n}", "Testeur", f"stat{n}@exemple.fr", "", "2024-01-01",
+            statut, priorite, "", None, [], None, source)
+
+
+def test_counters_of_seeded_database(seeded_db):
+    assert seeded_db.get_breakdown() == counted(seeded_db)
+    assert seeded_db.get_stats()["total"] == seeded_db.count_candidates()
+
+
+def test_counters_follow_insert_update_delete(seeded_db):
+    ids = [seeded_db.add_candidate(candidate(n, source=None)) for n in range(3)]
+    assert seeded_db.get_breakdown() == counted(seeded_db)
+    assert seeded_db.update_candidates([(ids[0], "statut", "Accepté"), (ids[1], "priorite", "Urgente")]) == {}
+    seeded_db.update_statut(ids[2], "Refusé")
+    assert seeded_db.get_breakdown() == counted(seeded_db)
+    seeded_db.delete_candidates(ids[:2])
+    seeded_db.delete_candidate(ids[2])
+    assert seeded_db.get_breakdown() == counted(seeded_db)
+
+
+def test_counters_follow_bulk_import(tmp_path):
+    pd = pytest.importorskip("pandas")
+    db = DatabaseManager(str(tmp_path / "stats.db"))
+    frame = pd.DataFrame({
+        "Nom": ["A", "B", "C"], "Poste": "Comptable", "Email": ["a@x.fr", "b@x.fr", "a@x.fr"],
+        "Téléphone": "", "Date": "2024-01-01", "Statut": ["Entretien", "", "Entretien"],
+        "Priorité": "Haute", "Notes": "", "Source": ["LinkedIn", None, "LinkedIn"],
+    })
+    report = db.bulk_add_candidates(frame)
+    assert len(report["inserted"]) == 2
+    assert db.get_breakdown() == counted(db)
+    assert db.get_stats()["total"] == 2
+    db.close()
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtGui import QGuiApplication, QImage  # noqa: E402
+
+from thumbnail_cache import ThumbnailCache  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return QGuiApplication.instance() or QGuiApplication([])
+
+
+@pytest.fixture
+def photo(tmp_path):
+    path = str(tmp_path / "photo.png")
+    image = QImage(400, 300, QImage.Format_RGB32)
+    image.fill(0xFF0000)
+    image.save(path, "PNG")
+    return path
+
+
+def test_truncated_thumbnail_is_regenerated(app, tmp_path, photo):
+    cache = ThumbnailCache(directory=str(tmp_path / "thumbs"))
+    assert not cache.generate(photo).isNull()
+    target = cache.disk_path(photo)
+    with open(target, "r+b") as f:
+        f.truncate(20)
+    assert cache.cached(photo) is None
+    assert not cache.get(photo).isNull()
+    assert not QImage(target).isNull()
+    assert os.listdir(cache.directory) == [os.path.basename(target)]
+
+
+def test_readding_a_path_does_not_count_it_twice(app, tmp_path, photo):
+    cache = ThumbnailCache(directory=str(tmp_path / "thumbs"))
+    image = cache.generate(photo)
+    cache.add(photo, image)
+    cost = cache._bytes
+    cache.add(photo, image)
+    assert cache._bytes == cost and len(cache._memory) == 1
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import re
+import tempfile
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+from profiling import profiler
+
+THUMB_DIR = "thumbnails"
+# Dossier <sha256> d'un fichier du stockage adressé par contenu
+STORE_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+class ThumbnailCache:
+    # Miniatures générées une seule fois et stockées sur disque sous
+    # <sha256 du fichier>_<taille>.png, devant lesquelles se tient un cache
+    # mémoire LRU borné en octets. Le sha256 est lu dans le chemin du stockage
+    # (FileStore) sans relire le fichier ; les autres chemins sont repérés par
+    # chemin, taille et date.
+    def __init__(self, size=40, directory=THUMB_DIR, max_bytes=32 * 1024 * 1024):
+        self.size = size
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._bytes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def file_key(path):
+        digest = os.path.basename(os.path.dirname(path))
+        if STORE_DIGEST.fullmatch(digest):
+            return digest
+        st = os.stat(path)
+        return hashlib.sha256(f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()
+
+    def disk_path(self, path):
+        return os.path.join(self.directory, f"{self.file_key(path)}_{self.size}.png")
+
+    @profiler.operation("miniature", rows=lambda image: None)
+    def generate(self, path):
+        # Décode l'original directement à taille réduite et enregistre la miniature.
+        # Renvoie une QImage (utilisable hors du thread graphique) ou None.
+        try:
+            target = self.disk_path(path)
+        except OSError:
+            return None
+        if os.path.exists(target):
+            image = QImage(target)
+            # PNG illisible (écriture interrompue) : régénéré
+            if not image.isNull():
+                return image
+        reader = QImageReader(path)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if size.isValid():
+            reader.setScaledSize(size.scaled(self.size, self.size, Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            return None
+        # Écrit à côté puis renommé : jamais de PNG partiel sous le nom définitif,
+        # même si deux threads génèrent la même miniature
+        fd, tmp = tempfile.mkstemp(suffix=".png", dir=self.directory)
+        os.close(fd)
+        try:
+            if image.save(tmp, "PNG"):
+                os.replace(tmp, target)
+        except OSError:
+            pass
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return image
+
+    def cached(self, path):
+        # Miniature déjà prête (mémoire, ou petit PNG sur disque), sans décoder
+        # l'original ; None sinon, à générer hors du thread graphique
+        pix = self._memory.get(path)
+        if pix is not None:
+            self._memory.move_to_end(path)
+            return pix
+        try:
+            target = self.disk_path(path)
+        except OSError:
+            return None
+        if not os.path.exists(target):
+            return None
+        return self.add(path, QImage(target))
+
+    def add(self, path, image):
+        if image is None or image.isNull():
+            return None
+        pix = QPixmap.fromImage(image)
+        old = self._memory.pop(path, None)
+        if old is not None:
+            self._bytes -= self._cost(old)
+        self._memory[path] = pix
+        self._bytes += self._cost(pix)
+        while self._bytes > self.max_bytes and len(self._memory) > 1:
+            _, old = self._memory.popitem(last=False)
+            self._bytes -= self._cost(old)
+        return pix
+
+    def get(self, path):
+        pix = self.cached(path)
+        if pix is None:
+            pix = self.add(path, self.generate(path))
+        return pix
+
+    @staticmethod
+    def _cost(pix):
+        return pix.width() * pix.height() * max(pix.depth(), 8) // 8